@@ -3,11 +3,13 @@ API 路由层
 提供 RESTful API 接口
 """
 
+import asyncio
+import json
 import logging
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.config import settings
 from app.models.schemas import (
@@ -15,8 +17,16 @@ from app.models.schemas import (
     BatchTaskResponse,
     TaskRequest,
     TaskResponse,
+    TaskStatus,
+)
+from app.services.pipeline import (
+    get_batch,
+    get_task,
+    process_batch,
+    process_single,
+    subscribe,
+    unsubscribe,
 )
-from app.services.pipeline import get_batch, get_task, process_batch, process_single
 from app.utils.helpers import is_douyin_url
 
 logger = logging.getLogger(__name__)
@@ -47,7 +57,10 @@ async def extract_single(request: TaskRequest):
         task_id, task = create_task(url)
         
         # 在后台启动处理任务
-        asyncio.create_task(process_single(task_id, url, use_llm=request.use_llm))
+        asyncio.create_task(process_single(
+            task_id, url, use_llm=request.use_llm, media_policy=request.media_policy,
+            quality=request.quality,
+        ))
         
         # 立即返回任务ID
         return task
@@ -81,7 +94,9 @@ async def extract_batch(request: BatchTaskRequest):
         )
 
     try:
-        result = await process_batch(urls, use_llm=request.use_llm)
+        result = await process_batch(
+            urls, use_llm=request.use_llm, media_policy=request.media_policy, quality=request.quality
+        )
         return result
     except Exception as e:
         logger.error(f"批量提取失败: {e}", exc_info=True)
@@ -97,6 +112,53 @@ async def get_task_status(task_id: str):
     return task
 
 
+@router.get("/task/{task_id}/events", summary="任务事件流 (SSE)")
+async def get_task_events(task_id: str):
+    """
+    以 Server-Sent Events 推送任务进度和识别片段
+
+    事件类型: progress（阶段进度）、segment（新识别出的片段）、done（最终任务结果）
+    连接建立时先补发当前进度和已产生的片段
+    """
+    task = get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    async def _stream():
+        # 订阅与快照之间没有 await，不会漏掉或重复片段
+        queue = subscribe(task_id)
+        snapshot = list(task.partial_segments)
+        try:
+            yield _sse("progress", {"status": task.status.value, "progress": task.progress})
+            for segment in snapshot:
+                yield _sse("segment", segment.model_dump())
+            if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                yield _sse("done", task.model_dump(mode="json"))
+                return
+
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event, data)
+                if event == "done":
+                    return
+        finally:
+            unsubscribe(task_id, queue)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @router.get("/batch/{batch_id}", response_model=Optional[BatchTaskResponse], summary="查询批量任务状态")
 async def get_batch_status(batch_id: str):
     """查询批量任务的处理状态"""
@@ -106,6 +168,30 @@ async def get_batch_status(batch_id: str):
     return batch
 
 
+@router.get("/browser/stats", summary="浏览器池指标")
+async def browser_stats():
+    """浏览器实例池、页面池、资源拦截和缓存的运行指标"""
+    from app.services.browser_fetcher import browser_fetcher
+
+    return browser_fetcher.stats()
+
+
+@router.get("/audio/stats", summary="音频提取指标")
+async def audio_stats():
+    """ffmpeg 并发数、排队情况和最近任务耗时"""
+    from app.services.audio_extractor import audio_extractor
+
+    return audio_extractor.stats()
+
+
+@router.get("/asr/stats", summary="语音识别指标")
+async def asr_stats():
+    """ASR 进程池队列深度、批量推理等运行指标"""
+    from app.services.transcriber import transcriber_service
+
+    return transcriber_service.stats()
+
+
 @router.get("/health", summary="健康检查")
 async def health_check():
     """服务健康检查"""
@@ -115,3 +201,18 @@ async def health_check():
         "llm_enabled": settings.llm_enabled,
         "llm_key_configured": bool(settings.ark_api_key or settings.llm_api_key),
     }
+
+
+@router.get("/ready", summary="就绪检查")
+async def readiness_check():
+    """
+    各组件（ASR 模型、浏览器池）是否已加载完成
+
+    未就绪时返回 503，负载均衡只把流量转发给已预热的实例
+    """
+    from app.services.readiness import readiness
+
+    data = readiness.stats()
+    if not data["ready"]:
+        return JSONResponse(status_code=503, content=data)
+    return data
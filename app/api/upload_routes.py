@@ -10,7 +10,7 @@ import shutil
 from typing import List
 
 from app.config import settings
-from app.services.pipeline import process_single
+from app.services.pipeline import audio_in_memory, process_single, transcribe_audio
 from app.models.schemas import TaskResponse
 
 logger = logging.getLogger(__name__)
@@ -57,7 +57,6 @@ async def upload_video_file(
         
         # 直接处理上传的文件，跳过下载阶段
         from app.services.audio_extractor import audio_extractor
-        from app.services.transcriber import transcriber_service
         from app.services.llm_enhancer import llm_enhancer
         from app.models.schemas import TaskStatus, TaskResponse
         from app.utils.helpers import generate_task_id
@@ -76,15 +75,18 @@ async def upload_video_file(
             cover_url=""
         )
         
-        # 直接从上传的文件提取音频
+        # 直接从上传的文件提取音频（与链接任务相同的解码方式，同一段音频共用转录缓存）
         task.status = TaskStatus.EXTRACTING_AUDIO
         task.progress = 0.3
-        audio_path = await audio_extractor.extract(file_path)
+        if audio_in_memory():
+            audio = await audio_extractor.extract_array(file_path)
+        else:
+            audio = await audio_extractor.extract(file_path)
         
         # 转录音频
         task.status = TaskStatus.TRANSCRIBING
         task.progress = 0.5
-        transcript = await transcriber_service.transcribe(audio_path)
+        transcript = await transcribe_audio(audio)
         task.transcript = transcript
         
         # LLM增强（如果启用）
@@ -4,7 +4,7 @@
 """
 
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -33,17 +33,71 @@ class Settings(BaseSettings):
     asr_mode: str = "local"
     # 本地 Whisper 模型大小: tiny, base, small, medium, large-v3
     whisper_model_size: str = "medium"
+    # 模型分级（从小到大，逗号分隔，如 "tiny,small,medium"），按时长/积压/质量偏好逐任务选择
+    # 留空只使用 whisper_model_size；分级中的模型会全部常驻内存
+    whisper_model_tiers: str = ""
+    # 超过该时长（秒）的音频降一级模型（0 表示不按时长降级）
+    asr_long_clip_duration: float = 300
+    # 每积压这么多个转录任务降一级模型（0 表示不按积压降级）
+    asr_backlog_step: int = 4
     # Whisper 设备: cpu / cuda / auto
     whisper_device: str = "auto"
     # Whisper 计算精度: float16 / int8 / float32
     whisper_compute_type: str = "float16"
     # 识别语言 (留空自动检测)
     whisper_language: str = "zh"
+    # 跨文件批量推理：合并同时排队的多个音频做一次批量推理（仅内存音频，需要 faster-whisper 1.2.1+）
+    asr_batch_enabled: bool = False
+    # 单批最多合并的文件数、第一个请求到达后的最长等待时间（秒）
+    asr_batch_max_files: int = 8
+    asr_batch_max_wait: float = 0.5
+    # 每次前向计算的窗口数（30 秒一个窗口）
+    asr_batch_size: int = 8
+    # 多进程 ASR：工作进程数（0 表示在 API 进程内转录），每个进程各加载一份模型
+    asr_workers: int = 0
+    # 每个工作进程的 CPU 线程数（0 表示 CPU 核数 / 进程数）
+    asr_worker_threads: int = 0
+    # 多进程模式下超过该时长（秒）的音频在停顿处切块并行转录（0 表示不切分）
+    asr_split_min_duration: float = 120
+    # 找不到停顿而硬切时，相邻块的重叠时长（秒）
+    asr_split_overlap: float = 1.0
+    # 启动时加载 Whisper 模型并做一次预热推理（/api/ready 在完成前返回 503）
+    asr_preload: bool = True
+    # 转录结果缓存：按解码后音频的哈希复用结果（转发、短链、重复上传）
+    transcript_cache_enabled: bool = True
+    transcript_cache_dir: str = str(BASE_DIR / "data" / "transcripts")
+    # 缓存总大小上限（MB），超出后淘汰最久未使用的记录
+    transcript_cache_max_mb: int = 200
+    # 音频指纹：识别重新编码、裁剪过的近似重复音频，复用已有转录结果
+    # 默认关闭：共用背景音乐的不同视频也可能得到不低的指纹得分
+    fingerprint_enabled: bool = False
+    fingerprint_dir: str = str(BASE_DIR / "data" / "fingerprints")
+    fingerprint_max_entries: int = 2000
+    # 指纹索引占用内存上限（MB，每个哈希约 12 字节，一分钟音频最多约 0.2MB），超出后淘汰最久未命中的条目
+    fingerprint_max_mb: int = 100
+    # 与参考音频对齐的指纹哈希占比达到该值才视为重复
+    fingerprint_match_threshold: float = 0.4
+    # 命中后先转录匹配范围中间这么长（秒）的一段，与参考转录比对文字，0 表示不校验
+    fingerprint_verify_seconds: float = 8.0
+    # 校验片段的文字在参考转录中能找到的比例达到该值才复用
+    fingerprint_verify_similarity: float = 0.6
+    # 匹配范围之外的首尾部分超过该时长（秒）时单独转录，否则视为完全覆盖
+    fingerprint_min_uncovered: float = 3.0
 
     # ─── OpenAI Whisper API 配置 (asr_mode=api 时使用) ───
     openai_api_key: Optional[str] = None
     openai_api_base: str = "https://api.openai.com/v1"
     openai_whisper_model: str = "whisper-1"
+    # 上传前转码的格式：ogg（Opus）/ mp3 / wav（不转码，16kHz WAV 约 1.9MB/分钟）
+    openai_upload_format: Literal["ogg", "mp3", "wav"] = "ogg"
+    # 转码码率（kbps），语音 24~32k 已足够
+    openai_upload_bitrate: int = 32
+    # 单次上传大小上限（MB，API 限制 25MB），超出时在停顿处切块分别上传
+    openai_max_upload_mb: float = 24
+    # 复用的 HTTP 连接数（keep-alive，避免每个文件重新握手）
+    openai_max_connections: int = 8
+    # 单次转录请求超时（秒）
+    openai_timeout: int = 600
 
     # ─── LLM 大模型配置 (用于文案增强) ───
     llm_enabled: bool = True
@@ -54,12 +108,85 @@ class Settings(BaseSettings):
     llm_temperature: float = 0.3
     llm_max_tokens: int = 4096
 
+    # ─── 媒体下载配置 ───
+    # 媒体版本选择策略: audio (优先纯音频) / lowest (最低码率) / highest (最大视频)
+    media_policy: str = "audio"
+    # 下载数据直接通过管道送入 ffmpeg 提取音频，不写临时视频文件（失败时自动回退）
+    stream_extraction: bool = True
+    # 音频直接解码为内存中的 float32 数组交给本地模型，不写中间 WAV 文件
+    # （API 模式下只有开启裁剪时才解码到内存，裁剪后再写成 WAV 上传）
+    audio_in_memory: bool = True
+    # ASR 前裁剪非语音区间（仅内存音频），时间轴会自动还原
+    speech_trim_enabled: bool = True
+    # 相对整段响度的门限（dB），低于此电平视为非语音
+    speech_trim_threshold_db: float = -35.0
+    # 短于该时长（秒）的停顿不裁剪
+    speech_trim_min_silence: float = 1.0
+    # 语音区间前后保留的余量（秒）
+    speech_trim_padding: float = 0.25
+    # 先用 HTTP 请求分享页解析播放地址，失败再启动浏览器
+    http_fast_path_enabled: bool = True
+    # 媒体地址缓存（按 video_id，有效期取自签名 URL 的过期时间）
+    media_cache_enabled: bool = True
+    media_cache_size: int = 512
+    # 无法从 URL 解析过期时间时的缓存时长，同时也是缓存时长上限（秒）
+    media_cache_ttl: int = 600
+    # 缓存持久化文件（留空仅保存在内存）
+    media_cache_file: Optional[str] = None
+
     # ─── 批量处理配置 ───
     max_concurrent_tasks: int = 3
     download_timeout: int = 120
+    # ffmpeg 并发进程数（0 表示等于 CPU 核数）与单个任务超时（秒，流式任务包含下载时间）
+    ffmpeg_concurrency: int = 0
+    ffmpeg_timeout: int = 300
+    # 流式下载分块大小（字节）
+    download_chunk_size: int = 256 * 1024
+    # 分段并发下载的段数（1 表示关闭分段下载）
+    download_segments: int = 4
+    # 超过该大小（字节）才启用分段下载
+    download_segment_min_size: int = 8 * 1024 * 1024
+    # 下载中断后的重试次数（支持 Range 时从断点续传）
+    download_retries: int = 3
+    # 未完成的 .part 断点文件保留时长（秒），重新提交同一视频时可继续下载
+    download_part_ttl: int = 24 * 3600
     request_timeout: int = 30
 
+    # ─── 浏览器配置 ───
+    # 浏览器实例数（每个实例是独立的 Chromium 进程，任务按负载分配）
+    browser_instances: int = 1
+    # 每个实例处理多少个页面后回收重启（0 不限制）
+    browser_max_pages: int = 500
+    # 实例内存（进程树 RSS, MB）超过该值后回收重启，需要安装 psutil（0 不限制）
+    browser_max_rss_mb: int = 1500
+    # 每个实例的页面池大小（同时可用的页面/上下文数量）
+    browser_pool_size: int = 3
+    # 单个页面使用多少次后回收重建
+    browser_page_max_uses: int = 50
+    # 启动时预热浏览器和页面池
+    browser_pool_warmup: bool = True
+    # 浏览器会话（Cookie / localStorage）持久化文件，留空不保存
+    browser_storage_state_file: Optional[str] = str(BASE_DIR / "data" / "browser_state.json")
+    # 会话快照间隔（秒），0 表示只在关闭时保存
+    browser_storage_state_interval: int = 300
+    # 页面就绪最长等待时间（秒），捕获到媒体资源/详情接口/目标元素会提前结束
+    browser_ready_timeout: float = 5.0
+    # 页面就绪的 DOM 选择器（留空则不按元素判断）
+    browser_ready_selector: str = "video[src], video source[src]"
+    # 拦截与文案提取无关的资源（逗号分隔）
+    browser_block_enabled: bool = True
+    # 按资源类型拦截: image / font / stylesheet / media / script ...
+    browser_block_resource_types: str = "image,font,stylesheet"
+    # 按域名拦截（支持通配符），默认拦截统计上报
+    browser_block_hosts: str = (
+        "mcs.zijieapi.com,mon.zijieapi.com,*.ibytedapm.com,mcs.snssdk.com,"
+        "*.google-analytics.com,*.googletagmanager.com"
+    )
+    # 始终放行的域名（优先级最高）
+    browser_allow_hosts: str = ""
+
     # ─── yt-dlp 配置 ───
+    # Netscape 格式 cookies 文件，浏览器启动时也会导入
     ytdlp_cookies_file: Optional[str] = None
     # 从浏览器自动提取 cookies: chrome / edge / firefox / 留空不使用
     ytdlp_cookies_from_browser: str = "chrome"
@@ -19,6 +19,7 @@ from fastapi.staticfiles import StaticFiles
 from app.api.routes import router
 from app.api.upload_routes import router as upload_router
 from app.config import BASE_DIR, settings
+from app.services.readiness import readiness
 
 # ─── 日志配置 ───
 logging.basicConfig(
@@ -32,6 +33,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# 启动时的后台预热任务（保持引用，避免被垃圾回收）
+_background_tasks: set = set()
+
 # ─── 创建 FastAPI 应用 ───
 app = FastAPI(
     title=settings.app_name,
@@ -78,6 +82,48 @@ async def startup():
     logger.info(f"   输出目录: {settings.output_dir}")
     settings.ensure_dirs()
 
+    from app.services.media_downloader import MediaDownloader
+
+    MediaDownloader.clean_stale_parts(settings.temp_dir, settings.download_part_ttl)
+
+    # 预热在后台进行：/api/health 立即可用，/api/ready 在预热完成后才返回就绪
+    if settings.asr_preload:
+        readiness.register("asr")
+    if settings.browser_pool_warmup:
+        readiness.register("browser", required=False)
+    task = asyncio.ensure_future(_preload())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _preload():
+    """加载并预热 ASR 模型和浏览器池"""
+    jobs = []
+    if settings.asr_preload:
+        from app.services.transcriber import transcriber_service
+
+        jobs.append(readiness.track("asr", transcriber_service.warmup()))
+    if settings.browser_pool_warmup:
+        from app.services.browser_fetcher import browser_fetcher
+
+        jobs.append(readiness.track("browser", browser_fetcher.start()))
+    await asyncio.gather(*jobs)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    from app.services.browser_fetcher import browser_fetcher
+    from app.services.http_fetcher import http_fetcher
+    from app.services.media_downloader import media_downloader
+    from app.services.transcriber import transcriber_service
+
+    await browser_fetcher.close()
+    await http_fetcher.close()
+    await media_downloader.close()
+    for task in list(_background_tasks):
+        task.cancel()
+    await transcriber_service.close()
+
 
 if __name__ == "__main__":
     import uvicorn
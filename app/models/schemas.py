@@ -20,6 +20,29 @@ class TaskStatus(str, Enum):
     FAILED = "failed"
 
 
+class MediaPolicy(str, Enum):
+    """媒体版本选择策略"""
+    AUDIO = "audio"        # 优先纯音频流，没有则选最低码率
+    LOWEST = "lowest"      # 最低码率/最小体积
+    HIGHEST = "highest"    # 最大体积的视频
+
+
+class QualityHint(str, Enum):
+    """识别质量偏好（本地模式下影响模型选择）"""
+    FAST = "fast"            # 最小的模型，速度优先
+    BALANCED = "balanced"    # 按时长和积压自动选择
+    ACCURATE = "accurate"    # 最大的模型，准确率优先
+
+
+class MediaRendition(BaseModel):
+    """媒体版本（某一码率的视频流或音频流）"""
+    url: str = ""
+    kind: str = Field(default="video", description="video / audio")
+    bitrate: int = Field(default=0, description="码率(bps)，未知为 0")
+    size: int = Field(default=0, description="文件大小(字节)，未知为 0")
+    mime_type: str = ""
+
+
 class VideoInfo(BaseModel):
     """视频信息"""
     video_id: str = ""
@@ -28,6 +51,7 @@ class VideoInfo(BaseModel):
     duration: float = 0.0
     url: str = ""
     cover_url: str = ""
+    rendition: Optional[MediaRendition] = Field(default=None, description="实际下载的媒体版本")
 
 
 class TranscriptSegment(BaseModel):
@@ -44,18 +68,23 @@ class TranscriptResult(BaseModel):
     segments: List[TranscriptSegment] = Field(default_factory=list, description="时间轴片段")
     language: str = Field(default="", description="检测到的语言")
     confidence: float = Field(default=0.0, description="整体置信度")
+    model: str = Field(default="", description="使用的识别模型")
 
 
 class TaskRequest(BaseModel):
     """单个任务请求"""
     url: str = Field(description="抖音视频链接")
     use_llm: bool = Field(default=True, description="是否使用大模型增强")
+    media_policy: Optional[MediaPolicy] = Field(default=None, description="媒体版本选择策略，留空使用服务端配置")
+    quality: Optional[QualityHint] = Field(default=None, description="识别质量偏好: fast / balanced / accurate，留空自动选择")
 
 
 class BatchTaskRequest(BaseModel):
     """批量任务请求"""
     urls: List[str] = Field(description="抖音视频链接列表")
     use_llm: bool = Field(default=True, description="是否使用大模型增强")
+    media_policy: Optional[MediaPolicy] = Field(default=None, description="媒体版本选择策略，留空使用服务端配置")
+    quality: Optional[QualityHint] = Field(default=None, description="识别质量偏好: fast / balanced / accurate，留空自动选择")
 
 
 class TaskResponse(BaseModel):
@@ -66,6 +95,9 @@ class TaskResponse(BaseModel):
     progress: float = 0.0
     video_info: Optional[VideoInfo] = None
     transcript: Optional[TranscriptResult] = None
+    partial_segments: List[TranscriptSegment] = Field(
+        default_factory=list, description="识别过程中已产生的片段（完成后以 transcript 为准）"
+    )
     error: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.now)
     completed_at: Optional[datetime] = None
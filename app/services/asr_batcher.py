@@ -0,0 +1,211 @@
+"""
+跨文件批量推理
+把同时排队的多个音频的 VAD 语音块合并成一次 faster-whisper 批量推理，
+再按时间范围把识别片段分回各自的任务。CPU 上吞吐量提升最明显
+"""
+
+import asyncio
+import bisect
+import functools
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from app.config import settings
+from app.models.schemas import TranscriptResult, TranscriptSegment
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# Whisper 单个窗口的最大时长（秒）
+CHUNK_LENGTH = 30
+# 拼接时各文件之间插入的静音（秒），避免片段时间落在边界上
+FILE_GAP = 1.0
+# 1.2.1 起 clip_timestamps 以秒为单位，且每个片段单独成为一个推理窗口；
+# 1.2.0 会把相邻片段拼进同一个 30 秒窗口，窗口可能横跨两个文件，1.1.x 则以采样点为单位
+MIN_FASTER_WHISPER = (1, 2, 1)
+
+
+@functools.lru_cache(maxsize=1)
+def batching_supported() -> bool:
+    """已安装的 faster-whisper 能否安全地跨文件批量推理"""
+    try:
+        from faster_whisper import __version__
+    except ImportError:
+        return False
+    version = tuple(int(part) for part in re.findall(r"\d+", __version__)[:3])
+    if version < MIN_FASTER_WHISPER:
+        logger.warning(
+            f"faster-whisper {__version__} 不支持逐片段批量推理"
+            f"（需要 {'.'.join(map(str, MIN_FASTER_WHISPER))}+），已关闭跨文件批量"
+        )
+        return False
+    return True
+
+
+@dataclass
+class _Job:
+    audio: "np.ndarray"
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+def group_speech(chunks: List[dict], max_samples: int) -> List[Tuple[int, int]]:
+    """把相邻的 VAD 语音块合并成不超过 max_samples 的窗口（采样点）"""
+    windows: List[List[int]] = []
+    for chunk in chunks:
+        if windows and chunk["end"] - windows[-1][0] <= max_samples:
+            windows[-1][1] = chunk["end"]
+        else:
+            windows.append([chunk["start"], chunk["end"]])
+    return [(start, end) for start, end in windows]
+
+
+class BatchingTranscriber:
+    """
+    批量推理前端
+
+    1. 请求进入队列，第一个请求到达后最多等待 max_wait 秒收集更多请求
+    2. 对每个音频做 VAD，切成不超过 30 秒的窗口，所有窗口一起送入 BatchedInferencePipeline
+    3. 识别片段按拼接时的偏移量分回各个请求
+    """
+
+    def __init__(
+        self,
+        get_model: Callable[[], object],
+        max_files: int = 8,
+        max_wait: float = 0.5,
+        batch_size: int = 8,
+    ):
+        self._get_model = get_model
+        self.max_files = max(1, max_files)
+        self.max_wait = max_wait
+        self.batch_size = max(1, batch_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pipeline = None
+        self.batches = 0
+        self.files = 0
+
+    async def transcribe(self, audio: "np.ndarray") -> TranscriptResult:
+        """提交一个 16kHz float32 音频，等待所在批次完成"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+
+        job = _Job(audio=audio, future=asyncio.get_event_loop().create_future())
+        await self._queue.put(job)
+        return await job.future
+
+    async def _run(self):
+        while True:
+            jobs = [await self._queue.get()]
+            deadline = jobs[0].queued_at + self.max_wait
+            while len(jobs) < self.max_files:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    jobs.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            jobs = [job for job in jobs if not job.future.cancelled()]
+            if not jobs:
+                continue
+
+            loop = asyncio.get_event_loop()
+            try:
+                results = await loop.run_in_executor(None, self._transcribe_batch, [j.audio for j in jobs])
+            except Exception as e:
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                continue
+
+            for job, result in zip(jobs, results):
+                if not job.future.done():
+                    job.future.set_result(result)
+
+    def _transcribe_batch(self, audios: List["np.ndarray"]) -> List[TranscriptResult]:
+        """在线程池中执行：拼接、VAD、批量推理、拆分结果"""
+        import numpy as np
+        from faster_whisper import BatchedInferencePipeline
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        if self._pipeline is None:
+            self._pipeline = BatchedInferencePipeline(self._get_model())
+
+        vad_options = VadOptions(
+            min_silence_duration_ms=500,
+            speech_pad_ms=200,
+            max_speech_duration_s=CHUNK_LENGTH,
+        )
+        gap = np.zeros(int(FILE_GAP * SAMPLE_RATE), dtype=np.float32)
+
+        parts: List["np.ndarray"] = []
+        ranges: List[Tuple[float, float]] = []
+        clips: List[dict] = []
+        position = 0
+        for audio in audios:
+            for start, end in group_speech(get_speech_timestamps(audio, vad_options), CHUNK_LENGTH * SAMPLE_RATE):
+                clips.append({
+                    "start": (position + start) / SAMPLE_RATE,
+                    "end": (position + end) / SAMPLE_RATE,
+                })
+            ranges.append((position / SAMPLE_RATE, (position + len(audio)) / SAMPLE_RATE))
+            parts.extend([audio, gap])
+            position += len(audio) + len(gap)
+
+        results = [
+            TranscriptResult(language=settings.whisper_language or "", confidence=0.0)
+            for _ in audios
+        ]
+        if not clips:
+            return results
+
+        segments_iter, info = self._pipeline.transcribe(
+            np.concatenate(parts),
+            language=settings.whisper_language or None,
+            # 未指定语言时逐窗口检测，避免不同文件共用一次语言检测
+            multilingual=not settings.whisper_language,
+            beam_size=5,
+            clip_timestamps=clips,
+            batch_size=self.batch_size,
+            word_timestamps=False,
+        )
+
+        # 每个窗口只包含一个文件的语音，片段按中点归属到所在文件
+        starts = [start for start, _ in ranges]
+        for seg in segments_iter:
+            index = max(0, bisect.bisect_right(starts, (seg.start + seg.end) / 2) - 1)
+            offset, end = ranges[index]
+            results[index].segments.append(TranscriptSegment(
+                start=round(max(seg.start, offset) - offset, 3),
+                end=round(min(seg.end, end) - offset, 3),
+                text=seg.text.strip(),
+            ))
+
+        for result in results:
+            result.raw_text = ''.join(seg.text for seg in result.segments)
+            result.language = info.language
+            result.confidence = round(info.language_probability, 4)
+
+        self.batches += 1
+        self.files += len(audios)
+        logger.info(f"批量推理完成: {len(audios)} 个文件，{len(clips)} 个窗口")
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "files": self.files,
+            "avg_files_per_batch": round(self.files / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize() if self._queue else 0,
+        }
@@ -0,0 +1,199 @@
+"""
+多进程 ASR 工作池
+每个工作进程启动时加载 Whisper 模型（配置了分级时每级各一份）并固定 cpu_threads，
+转录不再与 API 进程争抢 GIL
+音频通过文件路径或共享内存传入，工作进程崩溃后进程池自动重建
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.config import settings
+from app.models.schemas import TranscriptResult
+
+logger = logging.getLogger(__name__)
+
+# 工作进程内的模型实例（模型尺寸 -> 模型）
+_worker_models: Dict[str, object] = {}
+_worker_threads = 0
+# 预热屏障：每个进程预热完成后在此等待，保证每个进程恰好执行一次预热
+_worker_barrier = None
+
+# 等待其他进程完成预热的最长时间（秒），超时说明有进程加载失败或卡住
+WARMUP_TIMEOUT = 900
+
+# 传给工作进程的音频：文件路径，或 (共享内存名, 采样点数)
+AudioRef = Union[Path, Tuple[str, int]]
+
+
+def _init_worker(cpu_threads: int, model_sizes: List[str], barrier=None):
+    """工作进程初始化：每个模型只加载一次"""
+    global _worker_threads, _worker_barrier
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)-7s | %(name)s[%(process)d] | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    _worker_threads = cpu_threads
+    _worker_barrier = barrier
+    for model_size in model_sizes:
+        _get_worker_model(model_size)
+
+
+def _get_worker_model(model_size: str):
+    if model_size not in _worker_models:
+        from app.services.transcriber import load_whisper_model
+
+        _worker_models[model_size] = load_whisper_model(model_size, cpu_threads=_worker_threads)
+    return _worker_models[model_size]
+
+
+def _warmup() -> int:
+    """
+    预热本进程的全部模型，然后等待其他进程都预热完成
+
+    进程阻塞在屏障上时不会再领取预热任务，因此 N 个预热任务恰好分布到 N 个进程
+    """
+    from app.services.transcriber import warmup_model
+
+    for model in _worker_models.values():
+        warmup_model(model)
+    if _worker_barrier is not None:
+        _worker_barrier.wait(WARMUP_TIMEOUT)
+    return os.getpid()
+
+
+def _transcribe_job(audio_ref: AudioRef, model_size: str) -> TranscriptResult:
+    """在工作进程中执行转录"""
+    from app.services.transcriber import run_transcription
+
+    model = _get_worker_model(model_size)
+    if isinstance(audio_ref, Path):
+        return run_transcription(model, audio_ref)
+
+    import numpy as np
+
+    name, length = audio_ref
+    # spawn 出的工作进程与主进程共用 resource_tracker，共享内存由主进程 unlink
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        audio = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)
+        result = run_transcription(model, audio)
+        del audio
+        return result
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # 仍有视图引用时交给垃圾回收
+
+
+class ASRProcessPool:
+    """Whisper 多进程工作池"""
+
+    def __init__(self, workers: int, cpu_threads: int = 0):
+        self.workers = max(1, workers)
+        self.cpu_threads = cpu_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            from app.services.transcriber import model_tiers
+
+            # CTranslate2 / CUDA 在 fork 出的子进程中不可靠
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                # 同步原语只能在创建进程时传入
+                initargs=(self.cpu_threads, model_tiers(), context.Barrier(self.workers)),
+            )
+            logger.info(f"ASR 进程池: {self.workers} 个进程，每个 {self.cpu_threads} 线程")
+        return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """工作进程崩溃后丢弃整个进程池，下次提交时重建"""
+        if self._executor is executor:
+            logger.warning("⚠️  ASR 工作进程异常退出，重建进程池")
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.restarts += 1
+
+    async def start(self):
+        """拉起全部工作进程，等待模型加载并各跑一次预热推理"""
+        executor = self._get_executor()
+        pids = await asyncio.gather(*[
+            asyncio.wrap_future(executor.submit(_warmup)) for _ in range(self.workers)
+        ])
+        if len(set(pids)) != self.workers:
+            raise RuntimeError(f"ASR 预热未覆盖全部工作进程: {sorted(set(pids))}")
+        logger.info(f"ASR 工作进程已预热: {sorted(pids)}")
+
+    async def transcribe(self, audio, model_size: Optional[str] = None) -> TranscriptResult:
+        """提交转录任务（文件路径或 float32 数组）"""
+        model_size = model_size or settings.whisper_model_size
+        self._pending += 1
+        shm = None
+        try:
+            if isinstance(audio, Path):
+                audio_ref: AudioRef = audio
+            else:
+                import numpy as np
+
+                audio = np.asarray(audio, dtype=np.float32)
+                shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+                np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+                audio_ref = (shm.name, len(audio))
+
+            # 进程池损坏时重建并重试一次
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    result = await asyncio.wrap_future(executor.submit(_transcribe_job, audio_ref, model_size))
+                    self.completed += 1
+                    return result
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    if attempt:
+                        raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "cpu_threads": self.cpu_threads,
+            "running": min(self._pending, self.workers),
+            "queue_depth": max(0, self._pending - self.workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# 全局单例
+asr_pool = ASRProcessPool(settings.asr_workers, settings.asr_worker_threads)
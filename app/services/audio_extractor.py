@@ -1,18 +1,47 @@
 """
 音频提取服务
 从视频文件中提取音频，转换为 ASR 友好的格式
+也支持把下载数据流直接通过管道送入 ffmpeg，边下载边提取，
+以及直接解码为内存中的 float32 数组，省去中间 WAV 文件；上传 API 前可压缩为 Opus/MP3
+ffmpeg 以原生 asyncio 子进程运行，独立的信号量限制并发，不占用默认线程池
 """
 
 import asyncio
 import logging
-import subprocess
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Deque, List, Optional, Tuple, Union
 
 from app.config import settings
+from app.services.speech_trimmer import OffsetMap, trim_audio
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+async def _iter_pcm(audio: "np.ndarray", chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    """把 float32 数组按块送入 ffmpeg 的 stdin"""
+    import numpy as np
+
+    data = memoryview(np.ascontiguousarray(audio, dtype=np.float32)).cast('B')
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+
+
+@dataclass
+class FFmpegJob:
+    """一次 ffmpeg 调用的耗时记录"""
+    kind: str
+    wait: float = 0.0          # 排队等待信号量的时间
+    run: float = 0.0           # ffmpeg 运行时间
+    status: str = "running"    # ok / failed / timeout / cancelled
+
+
 class AudioExtractor:
     """从视频中提取音频"""
 
@@ -20,6 +49,27 @@ class AudioExtractor:
     SAMPLE_RATE = 16000      # 16kHz 采样率
     CHANNELS = 1             # 单声道
     OUTPUT_FORMAT = "wav"    # WAV 无损格式
+    # 上传用的压缩格式（后缀 -> 编码参数），Opus 的 voip 模式针对语音优化
+    UPLOAD_CODECS = {
+        "ogg": ['-c:a', 'libopus', '-application', 'voip'],
+        "mp3": ['-c:a', 'libmp3lame'],
+    }
+    # 保留的最近任务耗时记录数
+    RECENT_JOBS = 50
+
+    def __init__(self):
+        self.concurrency = settings.ffmpeg_concurrency or os.cpu_count() or 1
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._running = 0
+        self._waiting = 0
+        self._recent: Deque[FFmpegJob] = deque(maxlen=self.RECENT_JOBS)
+        self._totals = {"ok": 0, "failed": 0, "timeout": 0, "cancelled": 0}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 懒创建，保证绑定到运行中的事件循环
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
 
     async def extract(self, video_path: Path, output_path: Path = None) -> Path:
         """
@@ -47,20 +97,38 @@ class AudioExtractor:
         ]
 
         logger.info(f"提取音频: {video_path.name} -> {output_path.name}")
+        await self._run_ffmpeg(cmd, kind="extract")
 
-        def _run():
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=settings.download_timeout,
-            )
-            if result.returncode != 0:
-                error_msg = result.stderr.decode('utf-8', errors='ignore')
-                raise RuntimeError(f"FFmpeg 音频提取失败: {error_msg}")
+        if not output_path.exists():
+            raise FileNotFoundError(f"音频提取完成但文件不存在: {output_path}")
 
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, _run)
+        logger.info(f"音频提取完成: {output_path} ({output_path.stat().st_size / 1024:.1f} KB)")
+        return output_path
+
+    async def extract_stream(self, chunks: AsyncIterator[bytes], output_path: Path) -> Path:
+        """
+        从数据流提取音频（ffmpeg 从 stdin 读取），下载与提取同时进行
+
+        Args:
+            chunks: 媒体数据块的异步迭代器
+            output_path: 输出音频路径
+
+        Returns:
+            音频文件路径
+        """
+        cmd = [
+            'ffmpeg',
+            '-i', 'pipe:0',                     # 从标准输入读取
+            '-vn',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(self.SAMPLE_RATE),
+            '-ac', str(self.CHANNELS),
+            '-y',
+            str(output_path),
+        ]
+
+        logger.info(f"流式提取音频 -> {output_path.name}")
+        await self._run_ffmpeg(cmd, chunks=chunks, kind="extract_stream")
 
         if not output_path.exists():
             raise FileNotFoundError(f"音频提取完成但文件不存在: {output_path}")
@@ -68,6 +136,218 @@ class AudioExtractor:
         logger.info(f"音频提取完成: {output_path} ({output_path.stat().st_size / 1024:.1f} KB)")
         return output_path
 
+    async def extract_array(self, video_path: Path) -> "np.ndarray":
+        """
+        从视频文件解码音频为 16kHz 单声道 float32 数组（不写 WAV 文件）
+
+        Returns:
+            取值范围 [-1, 1] 的 float32 数组，可直接交给 faster-whisper
+        """
+        logger.info(f"解码音频到内存: {video_path.name}")
+        return await self._decode_to_array(str(video_path), kind="decode")
+
+    async def extract_stream_array(self, chunks: AsyncIterator[bytes]) -> "np.ndarray":
+        """从数据流解码音频为 float32 数组，下载与解码同时进行"""
+        logger.info("流式解码音频到内存")
+        return await self._decode_to_array('pipe:0', chunks=chunks, kind="decode_stream")
+
+    async def _decode_to_array(
+        self,
+        source: str,
+        chunks: Optional[AsyncIterator[bytes]] = None,
+        kind: str = "decode",
+    ) -> "np.ndarray":
+        import numpy as np
+
+        cmd = [
+            'ffmpeg',
+            '-i', source,
+            '-vn',
+            '-f', 'f32le',                      # 原始 32 位浮点 PCM
+            '-acodec', 'pcm_f32le',
+            '-ar', str(self.SAMPLE_RATE),
+            '-ac', str(self.CHANNELS),
+            'pipe:1',                           # 输出到标准输出
+        ]
+        raw = await self._run_ffmpeg(cmd, chunks=chunks, capture_stdout=True, kind=kind)
+        audio = np.frombuffer(raw, dtype=np.float32)
+        if audio.size == 0:
+            raise RuntimeError("FFmpeg 没有输出任何音频数据")
+
+        logger.info(f"音频解码完成: {audio.size / self.SAMPLE_RATE:.1f}s ({audio.nbytes / 1024:.1f} KB)")
+        return audio
+
+    async def encode(self, audio: Union[Path, "np.ndarray"], output_path: Path, bitrate: int) -> Path:
+        """
+        把音频压缩编码为 output_path 后缀对应的格式（用于上传到 ASR API）
+
+        Args:
+            audio: 音频文件路径或 16kHz float32 数组（数组通过 stdin 传给 ffmpeg）
+            output_path: 输出路径，后缀为 .ogg（Opus）或 .mp3
+            bitrate: 码率（kbps）
+        """
+        codec = self.UPLOAD_CODECS.get(output_path.suffix.lstrip('.'))
+        if codec is None:
+            raise ValueError(f"不支持的上传编码格式: {output_path.suffix}（可选 {', '.join(self.UPLOAD_CODECS)}）")
+        if isinstance(audio, Path):
+            source, chunks = ['-i', str(audio)], None
+        else:
+            source = ['-f', 'f32le', '-ar', str(self.SAMPLE_RATE), '-ac', str(self.CHANNELS), '-i', 'pipe:0']
+            chunks = _iter_pcm(audio)
+
+        cmd = [
+            'ffmpeg',
+            *source,
+            '-vn',
+            *codec,
+            '-b:a', f'{bitrate}k',
+            '-ac', str(self.CHANNELS),
+            '-y',
+            str(output_path),
+        ]
+        await self._run_ffmpeg(cmd, chunks=chunks, kind="encode")
+
+        if not output_path.exists():
+            raise FileNotFoundError(f"音频编码完成但文件不存在: {output_path}")
+        return output_path
+
+    def trim_silence(self, audio: "np.ndarray") -> Tuple["np.ndarray", OffsetMap]:
+        """
+        去掉非语音区间（片头音乐、片尾、长静音），返回裁剪后的音频和时间偏移映射
+
+        转录结果需要经过 OffsetMap.remap 还原为原始时间轴
+        """
+        return trim_audio(
+            audio,
+            self.SAMPLE_RATE,
+            threshold_db=settings.speech_trim_threshold_db,
+            min_silence=settings.speech_trim_min_silence,
+            padding=settings.speech_trim_padding,
+        )
+
+    async def _run_ffmpeg(
+        self,
+        cmd: List[str],
+        chunks: Optional[AsyncIterator[bytes]] = None,
+        capture_stdout: bool = False,
+        kind: str = "ffmpeg",
+    ) -> bytes:
+        """
+        运行 ffmpeg 子进程（受并发信号量限制）
+
+        超时或任务被取消时 ffmpeg 进程会被杀掉
+
+        Args:
+            cmd: 命令行
+            chunks: 需要写入 stdin 的数据流（可选）
+            capture_stdout: 是否收集 stdout
+            kind: 任务类型，用于耗时统计
+
+        Returns:
+            stdout 内容（未收集时为空）
+        """
+        job = FFmpegJob(kind=kind)
+        queued_at = time.monotonic()
+        acquired = False
+        self._waiting += 1
+        try:
+            async with self._get_semaphore():
+                self._waiting -= 1
+                acquired = True
+                job.wait = time.monotonic() - queued_at
+                self._running += 1
+                started_at = time.monotonic()
+                try:
+                    stdout = await self._spawn(cmd, chunks, capture_stdout)
+                finally:
+                    job.run = time.monotonic() - started_at
+                    self._running -= 1
+            job.status = "ok"
+            return stdout
+        except asyncio.TimeoutError:
+            job.status = "timeout"
+            raise RuntimeError(f"FFmpeg 运行超时 ({settings.ffmpeg_timeout}s)")
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception:
+            job.status = "failed"
+            raise
+        finally:
+            if not acquired:
+                # 排队期间就被取消
+                self._waiting -= 1
+            self._recent.append(job)
+            self._totals[job.status] += 1
+            logger.debug(f"ffmpeg[{kind}] {job.status}: 等待 {job.wait:.2f}s, 运行 {job.run:.2f}s")
+
+    async def _spawn(
+        self,
+        cmd: List[str],
+        chunks: Optional[AsyncIterator[bytes]],
+        capture_stdout: bool,
+    ) -> bytes:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if chunks is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE if capture_stdout else asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def _feed():
+            try:
+                async for chunk in chunks:
+                    proc.stdin.write(chunk)
+                    await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # ffmpeg 提前退出，错误信息以 stderr 为准
+            finally:
+                proc.stdin.close()
+
+        async def _collect() -> Tuple[bytes, bytes]:
+            # 不能用 communicate()：Python 3.12 起它会立即关闭 stdin，_feed 写入的数据到不了 ffmpeg
+            stdout, stderr = await asyncio.gather(
+                proc.stdout.read() if capture_stdout else asyncio.sleep(0, b""),
+                proc.stderr.read(),
+            )
+            await proc.wait()
+            return stdout, stderr
+
+        feeder = asyncio.ensure_future(_feed()) if chunks is not None else None
+        try:
+            stdout, stderr = await asyncio.wait_for(_collect(), timeout=settings.ffmpeg_timeout)
+            if feeder:
+                # 下载出错时抛出下载异常
+                await feeder
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            if feeder and not feeder.done():
+                feeder.cancel()
+
+        if proc.returncode != 0:
+            error_msg = stderr.decode('utf-8', errors='ignore')
+            raise RuntimeError(f"FFmpeg 音频提取失败: {error_msg[-2000:]}")
+        return stdout or b""
+
+    def stats(self) -> dict:
+        """并发情况与最近任务耗时"""
+        recent = list(self._recent)
+        done = [j for j in recent if j.status == "ok"]
+        return {
+            "concurrency": self.concurrency,
+            "running": self._running,
+            "waiting": self._waiting,
+            "totals": dict(self._totals),
+            "avg_wait": round(sum(j.wait for j in done) / len(done), 3) if done else 0.0,
+            "avg_run": round(sum(j.run for j in done) / len(done), 3) if done else 0.0,
+            "recent": [
+                {"kind": j.kind, "status": j.status, "wait": round(j.wait, 3), "run": round(j.run, 3)}
+                for j in recent[-10:]
+            ],
+        }
+
 
 # 全局单例
 audio_extractor = AudioExtractor()
@@ -0,0 +1,396 @@
+"""
+音频指纹与近似重复检测
+对解码后的音频计算频谱峰值对哈希（constellation hashing），在索引中按时间偏移投票查找
+重新编码、裁剪或加了水印的转发视频。匹配成功时复用已有转录结果，只转录未覆盖的部分。
+每个条目记录转录时的模型、语言和解码参数（profile），只在 profile 相同的条目之间匹配
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.models.schemas import TranscriptResult
+from app.services.transcript_cache import transcript_cache
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+N_FFT = 1024
+HOP = 512                                    # 32ms 一帧
+FRAME_SEC = HOP / SAMPLE_RATE
+MIN_BIN, MAX_BIN = 6, 160                    # 取峰值的频率范围（约 190Hz ~ 5kHz）
+# 峰值需要是时间 ±3 帧、频率 ±8 个 bin 范围内的最大值
+PEAK_TIME, PEAK_FREQ = 3, 8
+PEAKS_PER_FRAME = 3                          # 每帧最多保留的峰值数
+FAN_OUT = 3                                  # 每个锚点与之后的 3 个峰值配对
+MAX_DT = 63                                  # 配对的最大帧间隔（6 bit）
+# 出现次数过多的哈希区分度低，查询时忽略
+MAX_HASH_OCCURRENCES = 200
+# 新增或淘汰的条目累积到一定数量后再合并进主索引（合并需要重新排序）
+MERGE_THRESHOLD = 32
+# 主索引中每个哈希占用的字节数（哈希、条目序号、帧号各 4 字节）
+HASH_BYTES = 12
+# 查询时按 1/4 帧错开多算几次指纹：起点与参考音频分帧错开越多，对齐的哈希越少
+QUERY_SHIFTS = 4
+
+
+def fingerprint(audio: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    计算音频指纹
+
+    Returns:
+        (hashes, times)：uint32 哈希及其锚点所在帧号
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    empty = (np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint32))
+    if len(audio) < N_FFT * 2:
+        return empty
+
+    frames = sliding_window_view(np.asarray(audio, dtype=np.float32), N_FFT)[::HOP]
+    spectrum = np.log1p(np.abs(np.fft.rfft(frames * np.hanning(N_FFT).astype(np.float32), axis=1)))
+    spectrum = spectrum[:, MIN_BIN:MAX_BIN]
+
+    # 可分离的二维最大值滤波：先沿频率、再沿时间
+    local_max = sliding_window_view(
+        np.pad(spectrum, ((0, 0), (PEAK_FREQ, PEAK_FREQ))), 2 * PEAK_FREQ + 1, axis=1,
+    ).max(axis=2)
+    local_max = sliding_window_view(
+        np.pad(local_max, ((PEAK_TIME, PEAK_TIME), (0, 0))), 2 * PEAK_TIME + 1, axis=0,
+    ).max(axis=2)
+    # 局部最大值，且明显高于整体能量（跳过静音和底噪）
+    floor = spectrum.mean() + spectrum.std()
+    strength = np.where((spectrum >= local_max) & (spectrum > floor), spectrum, 0)
+    # 每帧只保留最强的几个峰值
+    top = np.argsort(strength, axis=1)[:, -PEAKS_PER_FRAME:]
+    t = np.repeat(np.arange(len(strength)), top.shape[1])
+    f = top.ravel()
+    keep = strength[t, f] > 0
+    t, f = t[keep], f[keep] + MIN_BIN
+
+    hashes, times = [], []
+    for k in range(1, FAN_OUT + 1):
+        dt = t[k:] - t[:-k]
+        valid = (dt >= 1) & (dt <= MAX_DT)
+        anchor_f = f[:-k][valid].astype(np.uint32)
+        target_f = f[k:][valid].astype(np.uint32)
+        hashes.append((anchor_f << 15) | (target_f << 6) | dt[valid].astype(np.uint32))
+        times.append(t[:-k][valid].astype(np.uint32))
+    return np.concatenate(hashes), np.concatenate(times)
+
+
+@dataclass
+class FingerprintMatch:
+    """匹配结果（时间单位：秒）"""
+    clip_id: str
+    score: float             # 与参考音频对齐的查询哈希占比
+    offset: float            # 参考时间 = 查询时间 + offset
+    query_start: float       # 查询音频中被覆盖的范围
+    query_end: float
+    transcript: TranscriptResult
+
+    def shifted(self) -> TranscriptResult:
+        """参考转录结果换算到查询音频的时间轴（只有覆盖范围内的片段有意义）"""
+        segments = [
+            seg.model_copy(update={
+                'start': round(max(seg.start - self.offset, 0.0), 3),
+                'end': round(max(seg.end - self.offset, 0.0), 3),
+            })
+            for seg in self.transcript.segments
+        ]
+        return self.transcript.model_copy(update={'segments': segments})
+
+
+class FingerprintIndex:
+    """
+    指纹倒排索引
+
+    主索引是按哈希排序的三个并列数组（哈希、条目序号、帧号），用二分查找批量匹配；
+    新增条目先放在待合并列表中，积累到 MERGE_THRESHOLD 条后统一排序合并。
+    每个条目连同转录结果、profile 保存为一个 .npz 文件。条目数超过 max_entries
+    或索引大小超过 max_bytes 时淘汰最久未命中的条目；keep 返回 False 的条目（例如转录缓存
+    已淘汰的记录）在加载时丢弃，运行中通过 discard 移除
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path],
+        max_entries: int = 2000,
+        max_bytes: int = 0,
+        keep: Optional[Callable[[str], bool]] = None,
+    ):
+        self.directory = directory
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes                      # 0 表示不限
+        self.keep = keep
+        self._ids: Dict[int, str] = {}                  # 条目序号 -> clip_id
+        self._entries: Dict[str, int] = {}              # clip_id -> 条目序号
+        self._transcripts: Dict[int, str] = {}          # 条目序号 -> 转录结果 JSON
+        self._profiles: Dict[int, str] = {}             # 条目序号 -> 模型、语言、解码参数
+        self._sizes: Dict[int, int] = {}                # 条目序号 -> 索引占用字节数
+        self._live: "OrderedDict[int, None]" = OrderedDict()   # 有效条目，按最近使用排序
+        self._removed: Set[int] = set()                 # 已淘汰、尚未从主索引中清除的条目
+        self._main = None                               # (hashes, entries, times)
+        self._pending: List[Tuple[int, "np.ndarray", "np.ndarray"]] = []
+        # 等待移除的 clip_id（discard 可能在任意线程调用，统一在持锁时处理）
+        self._discarded: Deque[str] = deque()
+        self._next = 0
+        self._total = 0
+        self._loaded = False
+        # 匹配和登记都在线程池中执行
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        self._loaded = True
+        if not self.directory or not self.directory.exists():
+            return
+        import numpy as np
+
+        paths = sorted(self.directory.glob('*.npz'), key=lambda p: p.stat().st_mtime)
+        for path in paths[:-self.max_entries]:
+            path.unlink(missing_ok=True)
+        for path in paths[-self.max_entries:]:
+            if self.keep and not self.keep(path.stem):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    # 旧版本没有记录 profile 的条目不会再被匹配，随淘汰清理
+                    profile = str(data['profile']) if 'profile' in data.files else ''
+                    self._add(path.stem, data['hashes'], data['times'], str(data['transcript']), profile)
+            except Exception as e:
+                logger.warning(f"读取音频指纹失败 {path.name}: {e}")
+        self._merge()
+        if self._live:
+            logger.info(f"已加载音频指纹索引: {len(self._live)} 条")
+
+    def _add(self, clip_id: str, hashes: "np.ndarray", times: "np.ndarray", transcript: str, profile: str):
+        if clip_id in self._entries:
+            self._evict(self._entries[clip_id])
+        entry = self._next
+        self._next += 1
+        self._ids[entry] = clip_id
+        self._entries[clip_id] = entry
+        self._transcripts[entry] = transcript
+        self._profiles[entry] = profile
+        self._sizes[entry] = len(hashes) * HASH_BYTES
+        self._total += self._sizes[entry]
+        self._live[entry] = None
+        self._pending.append((entry, hashes, times))
+        # 至少保留刚加入的条目
+        while len(self._live) > 1 and (
+            len(self._live) > self.max_entries or (self.max_bytes and self._total > self.max_bytes)
+        ):
+            self._evict(next(iter(self._live)))
+        self._maybe_merge()
+
+    def _evict(self, entry: int):
+        self._live.pop(entry, None)
+        clip_id = self._ids.pop(entry)
+        if self._entries.get(clip_id) == entry:
+            del self._entries[clip_id]
+        self._total -= self._sizes.pop(entry, 0)
+        self._removed.add(entry)
+        self._transcripts.pop(entry, None)
+        self._profiles.pop(entry, None)
+        self._pending = [p for p in self._pending if p[0] != entry]
+        if self.directory:
+            (self.directory / f"{clip_id}.npz").unlink(missing_ok=True)
+
+    def discard(self, clip_id: str):
+        """移除条目（转录缓存淘汰记录时调用），下次匹配或登记时生效"""
+        self._discarded.append(clip_id)
+
+    def _apply_discards(self):
+        while self._discarded:
+            entry = self._entries.get(self._discarded.popleft())
+            if entry is not None:
+                self._evict(entry)
+        self._maybe_merge()
+
+    def _maybe_merge(self):
+        if len(self._pending) >= MERGE_THRESHOLD or len(self._removed) >= MERGE_THRESHOLD:
+            self._merge()
+
+    def _merge(self):
+        """把待合并条目并入主索引，同时清理已淘汰条目"""
+        import numpy as np
+
+        parts = [self._main] if self._main is not None else []
+        parts += [(h, np.full(len(h), e, dtype=np.uint32), t) for e, h, t in self._pending]
+        self._pending = []
+        if not parts:
+            return
+        hashes = np.concatenate([p[0] for p in parts])
+        entries = np.concatenate([p[1] for p in parts])
+        times = np.concatenate([p[2] for p in parts])
+        if self._removed:
+            keep = ~np.isin(entries, np.fromiter(self._removed, dtype=np.uint32))
+            hashes, entries, times = hashes[keep], entries[keep], times[keep]
+            self._removed.clear()
+        order = np.argsort(hashes, kind='stable')
+        self._main = (hashes[order], entries[order], times[order])
+
+    def _lookup(self, hashes: "np.ndarray", times: "np.ndarray"):
+        """返回所有命中的 (条目序号, 参考帧号, 查询哈希下标)"""
+        import numpy as np
+
+        found = []
+        if self._main is not None and len(self._main[0]):
+            main_hashes, main_entries, main_times = self._main
+            left = np.searchsorted(main_hashes, hashes, side='left')
+            right = np.searchsorted(main_hashes, hashes, side='right')
+            counts = right - left
+            usable = (counts > 0) & (counts <= MAX_HASH_OCCURRENCES)
+            left, counts, query_index = left[usable], counts[usable], np.flatnonzero(usable)
+            if len(counts):
+                # 展开每个查询哈希命中的全部位置
+                starts = np.repeat(left - np.cumsum(counts) + counts, counts)
+                positions = starts + np.arange(counts.sum())
+                found.append((main_entries[positions], main_times[positions], np.repeat(query_index, counts)))
+        for entry, pending_hashes, pending_times in self._pending:
+            q_index, p_index = self._match_unsorted(hashes, pending_hashes)
+            found.append((np.full(len(q_index), entry, dtype=np.uint32), pending_times[p_index], q_index))
+        return found
+
+    @staticmethod
+    def _match_unsorted(hashes: "np.ndarray", pending_hashes: "np.ndarray"):
+        """在未排序的条目中查找，返回 (查询下标, 条目内下标)"""
+        import numpy as np
+
+        order = np.argsort(pending_hashes, kind='stable')
+        sorted_hashes = pending_hashes[order]
+        left = np.searchsorted(sorted_hashes, hashes, side='left')
+        right = np.searchsorted(sorted_hashes, hashes, side='right')
+        counts = right - left
+        q_index = np.repeat(np.arange(len(hashes)), counts)
+        starts = np.repeat(left - np.cumsum(counts) + counts, counts)
+        return q_index, order[starts + np.arange(counts.sum())]
+
+    def match(self, audio: "np.ndarray", threshold: float, profile: str) -> Optional[FingerprintMatch]:
+        """
+        查找与音频最相似的已知条目
+
+        只考虑 profile 相同的条目（不同模型、语言的转录结果不能混用），得分低于阈值时返回 None
+        """
+        import numpy as np
+
+        # 查询音频的起点与参考音频的分帧位置不一定对齐，错开几次分别计算，取得分最高者
+        prints = [fingerprint(audio[shift:]) for shift in range(0, HOP, HOP // QUERY_SHIFTS)]
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._apply_discards()
+            allowed = np.array([e for e in self._live if self._profiles[e] == profile], dtype=np.int64)
+            candidates = [
+                self._match(hashes, times, threshold, allowed)
+                for hashes, times in prints if len(hashes) and len(allowed)
+            ]
+            match = max(filter(None, candidates), key=lambda m: m.score, default=None)
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # 命中的条目移到最近使用的一端，文件修改时间决定重启后的淘汰顺序
+            self._live.move_to_end(self._entries[match.clip_id])
+            if self.directory:
+                try:
+                    os.utime(self.directory / f"{match.clip_id}.npz")
+                except OSError:
+                    pass
+            return match
+
+    def _match(
+        self, hashes: "np.ndarray", times: "np.ndarray", threshold: float, allowed: "np.ndarray",
+    ) -> Optional[FingerprintMatch]:
+        import numpy as np
+
+        found = [f for f in self._lookup(hashes, times) if len(f[0])]
+        if not found:
+            return None
+        entries = np.concatenate([f[0] for f in found]).astype(np.int64)
+        query_index = np.concatenate([f[2] for f in found])
+        offsets = np.concatenate([f[1] for f in found]).astype(np.int64) - times[query_index].astype(np.int64)
+        usable = np.isin(entries, allowed)
+        entries, offsets, query_index = entries[usable], offsets[usable], query_index[usable]
+        if not len(entries):
+            return None
+
+        # 按 (条目, 时间偏移) 投票，正确的匹配会集中在同一个偏移上
+        votes = entries * (1 << 24) + (offsets + (1 << 23))
+        keys, counts = np.unique(votes, return_counts=True)
+        best = keys[counts.argmax()]
+        entry, offset = int(best >> 24), int((best & ((1 << 24) - 1)) - (1 << 23))
+        aligned = np.unique(query_index[(entries == entry) & (np.abs(offsets - offset) <= 1)])
+        score = len(aligned) / len(hashes)
+        if score < threshold:
+            return None
+
+        matched = times[aligned]
+        return FingerprintMatch(
+            clip_id=self._ids[entry],
+            score=round(score, 4),
+            offset=offset * FRAME_SEC,
+            query_start=float(matched.min()) * FRAME_SEC,
+            query_end=float(matched.max()) * FRAME_SEC,
+            transcript=TranscriptResult.model_validate_json(self._transcripts[entry]),
+        )
+
+    def add(self, clip_id: str, audio: "np.ndarray", result: TranscriptResult, profile: str):
+        """登记一段已转录的音频，profile 标识转录使用的模型、语言和解码参数"""
+        import numpy as np
+
+        hashes, times = fingerprint(audio)
+        if not len(hashes):
+            return
+        transcript = result.model_dump_json()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._apply_discards()
+            self._add(clip_id, hashes, times, transcript, profile)
+            # 在锁内写文件，避免与淘汰同一条目的删除交错留下孤立文件
+            if self.directory:
+                try:
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    tmp_path = self.directory / f"{clip_id}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        np.savez(
+                            f, hashes=hashes, times=times,
+                            transcript=np.array(transcript), profile=np.array(profile),
+                        )
+                    tmp_path.replace(self.directory / f"{clip_id}.npz")
+                except OSError as e:
+                    logger.warning(f"保存音频指纹失败: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._live),
+            "size_mb": round(self._total / 1024 / 1024, 2),
+            "indexed_hashes": int(len(self._main[0])) if self._main is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 全局单例
+# 启用转录缓存时，条目以缓存键命名，随转录缓存一起淘汰
+fingerprint_index = FingerprintIndex(
+    directory=Path(settings.fingerprint_dir),
+    max_entries=settings.fingerprint_max_entries,
+    max_bytes=settings.fingerprint_max_mb * 1024 * 1024,
+    keep=transcript_cache.__contains__ if settings.transcript_cache_enabled else None,
+)
+if settings.transcript_cache_enabled:
+    transcript_cache.on_evict.append(fingerprint_index.discard)
@@ -5,12 +5,23 @@
 import asyncio
 import logging
 import re
+import time
+import uuid
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import json
 
 from app.config import settings
-from app.models.schemas import VideoInfo
+from app.models.schemas import MediaPolicy, MediaRendition, VideoInfo
+from app.services.browser_pool import BrowserPool
+from app.services.douyin_parser import douyin_parser
+from app.services.http_fetcher import http_fetcher
+from app.services.media_cache import media_cache
+from app.services.media_downloader import ProgressCallback, build_cookie_header, media_downloader
+from app.services.media_selector import classify_media, select_rendition
+from app.services.page_pool import PooledPage
+from app.services.resource_blocker import ResourceBlocker, split_csv
+from app.services.session_store import SessionStore
 
 logger = logging.getLogger(__name__)
 
@@ -24,18 +35,53 @@ class BrowserFetcher:
     2. 模拟人的浏览行为
     3. 拦截网络请求获取资源 URL
     4. 直接下载音频/视频
+    
+    浏览器由 BrowserPool 管理（多个 Chromium 实例，按负载分配、自动回收和崩溃重启），
+    页面通过各实例的 PagePool 复用，每个槽位拥有独立的 BrowserContext
     """
     
+    # 视频详情接口，页面请求到它说明数据已就绪
+    DETAIL_API = '/aweme/v1/web/aweme/detail'
+    # 已捕获媒体后继续等待详情接口的时间（秒）
+    DETAIL_GRACE = 1.0
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    
+    LAUNCH_ARGS = [
+        '--disable-blink-features=AutomationControlled',  # 隐藏自动化特征
+        '--disable-dev-shm-usage',
+        '--no-sandbox',
+    ]
+    
     def __init__(self):
         self.playwright = None
-        self.browser = None
-        self.context = None
+        self.browser_pool: Optional[BrowserPool] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.session_store = SessionStore(
+            state_file=Path(settings.browser_storage_state_file) if settings.browser_storage_state_file else None,
+            cookies_file=Path(settings.ytdlp_cookies_file) if settings.ytdlp_cookies_file else None,
+        )
+        self.resource_blocker: Optional[ResourceBlocker] = None
+        if settings.browser_block_enabled:
+            self.resource_blocker = ResourceBlocker(
+                block_types=split_csv(settings.browser_block_resource_types),
+                deny_hosts=split_csv(settings.browser_block_hosts),
+                allow_hosts=split_csv(settings.browser_allow_hosts),
+            )
     
     async def _ensure_browser(self):
         """确保浏览器已启动"""
-        if self.browser:
+        if self.browser_pool:
             return
         
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.browser_pool:
+                return
+            await self._launch_browser()
+    
+    async def _launch_browser(self):
+        """启动浏览器实例池"""
         try:
             # Windows 平台修复：确保使用正确的事件循环
             import sys
@@ -56,24 +102,27 @@ class BrowserFetcher:
             
             self.playwright = await async_playwright().start()
             
-            # 启动浏览器（使用 chromium，最接近 Chrome）
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,  # 无头模式
-                args=[
-                    '--disable-blink-features=AutomationControlled',  # 隐藏自动化特征
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox',
-                ]
-            )
+            # 加载上次保存的会话，所有页面池上下文共享
+            self.session_store.load()
             
-            # 创建浏览器上下文
-            self.context = await self.browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                locale='zh-CN',
+            # 启动浏览器实例池（使用 chromium 无头模式，最接近 Chrome）
+            browser_pool = BrowserPool(
+                self.playwright,
+                self._create_slot,
+                launch_args=self.LAUNCH_ARGS,
+                size=settings.browser_instances,
+                pool_size=settings.browser_pool_size,
+                page_max_uses=settings.browser_page_max_uses,
+                max_pages=settings.browser_max_pages,
+                max_rss_mb=settings.browser_max_rss_mb,
+            )
+            await browser_pool.start(warmup=settings.browser_pool_warmup)
+            self.browser_pool = browser_pool
+            self.session_store.start_periodic(
+                settings.browser_storage_state_interval, self.save_session
             )
             
-            logger.info("✅ 浏览器启动成功")
+            logger.info(f"✅ 浏览器启动成功 ({settings.browser_instances} 个实例)")
             
         except ImportError:
             logger.error("❌ Playwright 未安装，请运行: pip install playwright && playwright install chromium")
@@ -82,39 +131,151 @@ class BrowserFetcher:
             logger.error(f"❌ 浏览器启动失败: {e}")
             raise
     
-    async def fetch_video_info(self, url: str) -> Tuple[Optional[str], Optional[VideoInfo]]:
+    async def start(self):
+        """启动浏览器（启用预热时同时创建好页面池）"""
+        await self._ensure_browser()
+    
+    async def _create_slot(self, browser) -> PooledPage:
+        """在指定浏览器实例上创建一个页面池槽位（独立上下文 + 常驻页面）"""
+        context = await browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent=self.USER_AGENT,
+            locale='zh-CN',
+            storage_state=self.session_store.state,
+        )
+        if self.resource_blocker:
+            await self.resource_blocker.attach(context)
+        page = await context.new_page()
+        return PooledPage(context=context, page=page)
+    
+    async def save_session(self):
+        """汇总所有上下文的浏览器会话并快照到磁盘，之后新建的上下文都会使用它"""
+        if not self.browser_pool:
+            return
+        await self.session_store.snapshot(self.browser_pool.contexts())
+    
+    async def fetch_video_info(
+        self,
+        url: str,
+        media_policy: Optional[MediaPolicy] = None,
+    ) -> Tuple[Optional[str], Optional[VideoInfo]]:
         """
         获取视频信息和资源 URL
         
+        Args:
+            url: 抖音视频链接
+            media_policy: 媒体版本选择策略，留空使用 settings.media_policy
+        
         Returns:
             (video_url, video_info) 或 (None, None)
+            选中的媒体版本记录在 video_info.rendition
         """
-        await self._ensure_browser()
+        video_url, video_info, _ = await self._resolve(url, media_policy)
+        return video_url, video_info
+    
+    async def _resolve(
+        self,
+        url: str,
+        media_policy: Optional[MediaPolicy] = None,
+    ) -> Tuple[Optional[str], Optional[VideoInfo], List[dict]]:
+        """
+        获取视频信息、资源 URL 以及下载时要带的 Cookie
         
-        page = await self.context.new_page()
-        video_url = None
-        video_info = None
+        Cookie 取自实际加载页面的上下文（每个槽位的上下文各自独立）；
+        命中缓存或走 HTTP 快速解析时没有打开页面，使用共享会话中的 Cookie
+        """
+        policy = media_policy or MediaPolicy(settings.media_policy)
+        cookies = self.session_store.cookies()
         
-        try:
-            # 拦截网络请求，捕获视频/音频 URL
-            captured_urls = []
-            
-            async def handle_response(response):
-                url = response.url
-                content_type = response.headers.get('content-type', '')
-                
-                # 捕获视频/音频资源
-                if any(ext in url for ext in ['.mp4', '.m4a', '.mp3']) or \
-                   any(t in content_type for t in ['video/', 'audio/']):
-                    captured_urls.append({
-                        'url': url,
-                        'type': content_type,
-                        'size': response.headers.get('content-length', 0),
-                    })
-                    logger.info(f"📦 捕获资源: {url[:100]}...")
+        # 命中缓存时直接复用已解析的媒体地址，不再打开页面
+        if settings.media_cache_enabled:
+            cached = media_cache.get(douyin_parser.extract_video_id(url) or url)
+            if cached:
+                logger.info(f"⚡ 命中媒体地址缓存: {cached.video_info.video_id}")
+                return (*self._select_media(cached.video_info.model_copy(), cached.renditions, policy), cookies)
+        
+        # 先尝试不启动浏览器的 HTTP 快速解析
+        video_info, renditions = None, []
+        if settings.http_fast_path_enabled:
+            video_info, renditions = await http_fetcher.fetch(url)
+        
+        if not renditions:
+            await self._ensure_browser()
             
-            page.on('response', handle_response)
+            async with self.browser_pool.acquire() as slot:
+                video_info, renditions = await self._fetch_with_page(slot.page, url)
+                try:
+                    cookies = await slot.context.cookies()
+                except Exception as e:
+                    logger.debug(f"读取页面 Cookie 失败: {e}")
+        
+        if video_info and settings.media_cache_enabled:
+            media_cache.put(video_info, renditions, alias=url)
+        
+        return (*self._select_media(video_info, renditions, policy), cookies)
+    
+    @staticmethod
+    def _select_media(
+        video_info: Optional[VideoInfo],
+        renditions: List[MediaRendition],
+        policy: MediaPolicy,
+    ) -> Tuple[Optional[str], Optional[VideoInfo]]:
+        """按策略选择资源 URL，并记录到 video_info.rendition"""
+        rendition = select_rendition(renditions, policy, video_info.duration if video_info else 0.0)
+        if not rendition:
+            return None, video_info
+        
+        logger.info(f"✅ 选择{'音频' if rendition.kind == 'audio' else '视频'} URL ({policy.value}): {rendition.url[:100]}...")
+        if video_info:
+            video_info.rendition = rendition
+        return rendition.url, video_info
+    
+    async def _fetch_with_page(self, page, url: str) -> Tuple[Optional[VideoInfo], List[MediaRendition]]:
+        """
+        在借出的页面上抓取视频信息和全部候选媒体版本
+        
+        Returns:
+            (video_info, renditions)，失败时为 (None, [])
+        """
+        video_info = None
+        
+        # 拦截网络请求，捕获视频/音频 URL
+        captured_urls = []
+        # 捕获到媒体资源或详情接口时置位，用于提前结束等待
+        ready = asyncio.Event()
+        # 拦截到的视频详情接口数据（aweme_detail）
+        detail = []
+        detail_ready = asyncio.Event()
+        
+        async def handle_response(response):
+            url = response.url
+            content_type = response.headers.get('content-type', '')
             
+            # 捕获视频/音频资源
+            kind = classify_media(url, content_type)
+            if kind:
+                captured_urls.append(MediaRendition(
+                    url=url,
+                    kind=kind,
+                    size=int(response.headers.get('content-length') or 0),
+                    mime_type=content_type,
+                ))
+                logger.info(f"📦 捕获资源: {url[:100]}...")
+                ready.set()
+            elif self.DETAIL_API in url:
+                ready.set()
+                try:
+                    data = await response.json()
+                except Exception as e:
+                    logger.debug(f"解析详情接口失败: {e}")
+                    return
+                if isinstance(data, dict) and data.get('aweme_detail'):
+                    detail.append(data['aweme_detail'])
+                    detail_ready.set()
+        
+        page.on('response', handle_response)
+        
+        try:
             logger.info(f"🌐 正在访问: {url}")
             
             # 访问页面（使用更宽松的等待策略）
@@ -124,104 +285,163 @@ class BrowserFetcher:
                 logger.warning(f"页面加载超时，尝试继续: {e}")
                 # 即使超时也继续，因为可能已经加载了部分内容
             
-            # 等待页面加载和 JavaScript 执行
-            await page.wait_for_timeout(5000)
+            # 等待页面就绪（事件驱动，最多 browser_ready_timeout 秒）
+            await self._wait_until_ready(page, ready)
             
-            # 尝试提取视频信息
-            try:
-                # 方法 1: 从页面标题提取
-                title = await page.title()
-                
-                # 方法 2: 从页面元素提取
-                try:
-                    desc_element = await page.query_selector('[data-e2e="video-desc"]')
-                    if desc_element:
-                        title = await desc_element.inner_text()
-                except:
-                    pass
-                
-                # 方法 3: 从 meta 标签提取
+            # 就绪选择器可能先于任何媒体响应和详情接口命中，再稍等片刻
+            if not captured_urls and not detail:
                 try:
-                    og_title = await page.get_attribute('meta[property="og:title"]', 'content')
-                    if og_title:
-                        title = og_title
-                except:
+                    await asyncio.wait_for(ready.wait(), self.DETAIL_GRACE)
+                except asyncio.TimeoutError:
                     pass
-                
-                # 提取作者
-                author = "未知作者"
+            
+            # 媒体先到而详情接口未到（或详情接口还在解析）时，再稍等片刻以拿到完整元数据
+            if not detail and ready.is_set():
                 try:
-                    author_element = await page.query_selector('[data-e2e="video-author-name"]')
-                    if author_element:
-                        author = await author_element.inner_text()
-                except:
+                    await asyncio.wait_for(detail_ready.wait(), self.DETAIL_GRACE)
+                except asyncio.TimeoutError:
                     pass
-                
-                # 提取视频 ID
-                video_id = re.search(r'/video/(\d+)', url)
-                video_id = video_id.group(1) if video_id else 'unknown'
-                
-                video_info = VideoInfo(
-                    video_id=video_id,
-                    title=title or f"抖音视频 {video_id}",
-                    author=author,
-                    duration=0,  # 需要从视频元数据获取
-                    url=url,
-                    cover_url="",
-                )
-                
-                logger.info(f"✅ 视频信息: {video_info.title} - {video_info.author}")
-                
-            except Exception as e:
-                logger.warning(f"⚠️  提取视频信息失败: {e}")
             
-            # 选择最佳资源 URL
-            if captured_urls:
-                # 优先选择 mp4 视频
-                video_urls = [u for u in captured_urls if '.mp4' in u['url'] or 'video/' in u['type']]
-                if video_urls:
-                    # 选择最大的
-                    video_urls.sort(key=lambda x: int(x['size']) if x['size'] else 0, reverse=True)
-                    video_url = video_urls[0]['url']
-                    logger.info(f"✅ 选择视频 URL: {video_url[:100]}...")
-                else:
-                    # 没有视频，选择音频
-                    audio_urls = [u for u in captured_urls if '.m4a' in u['url'] or '.mp3' in u['url'] or 'audio/' in u['type']]
-                    if audio_urls:
-                        video_url = audio_urls[0]['url']
-                        logger.info(f"✅ 选择音频 URL: {video_url[:100]}...")
+            if detail:
+                # 详情接口包含时长、封面和全部码率的播放地址，一次解析即可
+                video_info, api_renditions = douyin_parser.parse_aweme(detail[0], url)
+                if api_renditions:
+                    # 页面捕获的多为分段请求，大小不可靠，以接口数据为准
+                    captured_urls[:] = api_renditions
+                logger.info(f"✅ 视频信息: {video_info.title} - {video_info.author} ({video_info.duration:.0f}s)")
+            else:
+                video_info = await self._scrape_video_info(page, url)
             
-            if not video_url:
+            if not captured_urls:
                 logger.error("❌ 未捕获到视频/音频资源")
                 
                 # 尝试从页面 JavaScript 中提取
                 try:
                     video_url = await self._extract_from_page_script(page)
+                    if video_url:
+                        captured_urls.append(MediaRendition(url=video_url, kind="video"))
                 except Exception as e:
                     logger.error(f"从脚本提取失败: {e}")
             
-            return video_url, video_info
+            return video_info, captured_urls
             
         except Exception as e:
             logger.error(f"❌ 获取失败: {e}", exc_info=True)
-            return None, None
+            return None, []
+        finally:
+            # 页面会被复用，必须移除本次注册的监听器
+            page.remove_listener('response', handle_response)
+    
+    async def _scrape_video_info(self, page, url: str) -> Optional[VideoInfo]:
+        """详情接口不可用时，从 DOM 和 meta 标签提取视频信息"""
+        try:
+            # 方法 1: 从页面标题提取
+            title = await page.title()
+            
+            # 方法 2: 从页面元素提取
+            try:
+                desc_element = await page.query_selector('[data-e2e="video-desc"]')
+                if desc_element:
+                    title = await desc_element.inner_text()
+            except:
+                pass
+            
+            # 方法 3: 从 meta 标签提取
+            try:
+                og_title = await page.get_attribute('meta[property="og:title"]', 'content')
+                if og_title:
+                    title = og_title
+            except:
+                pass
+            
+            # 提取作者
+            author = "未知作者"
+            try:
+                author_element = await page.query_selector('[data-e2e="video-author-name"]')
+                if author_element:
+                    author = await author_element.inner_text()
+            except:
+                pass
+            
+            # 提取视频 ID（短链以跳转后的地址为准）
+            video_id = (
+                douyin_parser.extract_video_id(page.url)
+                or douyin_parser.extract_video_id(url)
+                or 'unknown'
+            )
+            
+            video_info = VideoInfo(
+                video_id=video_id,
+                title=title or f"抖音视频 {video_id}",
+                author=author,
+                duration=0,  # 需要从视频元数据获取
+                url=url,
+                cover_url="",
+            )
+            
+            logger.info(f"✅ 视频信息: {video_info.title} - {video_info.author}")
+            return video_info
+            
+        except Exception as e:
+            logger.warning(f"⚠️  提取视频信息失败: {e}")
+            return None
+    
+    async def _wait_until_ready(self, page, ready: asyncio.Event):
+        """
+        等待页面就绪，以下任一条件先满足即返回：
+        1. 捕获到首个媒体响应或视频详情接口响应（ready 事件）
+        2. DOM 中出现 browser_ready_selector
+        3. 达到 browser_ready_timeout 截止时间
+        """
+        timeout = settings.browser_ready_timeout
+        start = time.monotonic()
+        waiters = [asyncio.ensure_future(ready.wait())]
+        if settings.browser_ready_selector:
+            waiters.append(asyncio.ensure_future(page.wait_for_selector(
+                settings.browser_ready_selector,
+                state='attached',
+                timeout=timeout * 1000,
+            )))
+        
+        try:
+            pending = set(waiters)
+            while pending:
+                remaining = timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                # 选择器等待超时/失败不算就绪，继续等其他条件
+                if any(not t.exception() for t in done):
+                    break
         finally:
-            await page.close()
+            for t in waiters:
+                if not t.done():
+                    t.cancel()
+            # 取走已完成任务的异常，避免 "exception was never retrieved" 警告
+            for t in waiters:
+                if t.done() and not t.cancelled():
+                    t.exception()
+        
+        logger.debug(f"页面就绪等待 {time.monotonic() - start:.2f}s")
     
     async def _extract_from_page_script(self, page) -> Optional[str]:
-        """从页面 JavaScript 中提取视频 URL"""
+        """从页面 JavaScript 中提取视频 URL（只接受 http(s) 地址，blob: 等页面内地址无法下载）"""
         try:
             # 执行 JavaScript 获取视频元素
             video_src = await page.evaluate('''() => {
-                // 尝试从 video 标签获取
+                const usable = (src) => typeof src === 'string' && (/^https?:/i.test(src) || src.startsWith('//'));
+                
+                // 尝试从 video 标签获取（MSE 播放时为 blob: 地址，跳过）
                 const video = document.querySelector('video');
-                if (video && video.src) {
+                if (video && usable(video.src)) {
                     return video.src;
                 }
                 
                 // 尝试从 source 标签获取
                 const source = document.querySelector('video source');
-                if (source && source.src) {
+                if (source && usable(source.src)) {
                     return source.src;
                 }
                 
@@ -230,7 +450,7 @@ class BrowserFetcher:
                     try {
                         const state = window.__INITIAL_STATE__;
                         // 根据实际结构调整路径
-                        if (state.video && state.video.playAddr) {
+                        if (state.video && usable(state.video.playAddr)) {
                             return state.video.playAddr;
                         }
                     } catch (e) {}
@@ -239,7 +459,9 @@ class BrowserFetcher:
                 return null;
             }''')
             
-            if video_src:
+            if video_src and video_src.startswith('//'):
+                video_src = 'https:' + video_src
+            if video_src and video_src.startswith(('http://', 'https://')):
                 logger.info(f"✅ 从页面脚本提取到 URL: {video_src[:100]}...")
                 return video_src
             
@@ -248,67 +470,117 @@ class BrowserFetcher:
         
         return None
     
-    async def download_resource(self, url: str, output_path: Path) -> bool:
-        """下载资源"""
+    def get_request_headers(self, url: str, cookies: Optional[List[dict]] = None) -> Dict[str, str]:
+        """
+        生成下载请求头，携带与 url 域名匹配的 Cookie
+        
+        cookies 留空时使用共享会话中的 Cookie
+        """
+        if cookies is None:
+            cookies = self.session_store.cookies()
+        
+        headers = {
+            'Referer': 'https://www.douyin.com/',
+            'User-Agent': self.USER_AGENT,
+        }
+        cookie_header = build_cookie_header(cookies, url)
+        if cookie_header:
+            headers['Cookie'] = cookie_header
+        return headers
+    
+    async def download_resource(
+        self,
+        url: str,
+        output_path: Path,
+        on_progress: Optional[ProgressCallback] = None,
+        cookies: Optional[List[dict]] = None,
+        resume_path: Optional[Path] = None,
+    ) -> bool:
+        """
+        下载资源
+        
+        优先使用 httpx 流式下载（分块写盘，内存占用恒定），失败时回退到浏览器内下载
+        cookies 为解析该视频时页面上下文中的 Cookie，resume_path 为各任务共用的断点文件路径
+        """
         try:
-            await self._ensure_browser()
+            headers = self.get_request_headers(url, cookies)
             
-            page = await self.context.new_page()
+            logger.info(f"📥 开始流式下载: {url[:100]}...")
+            try:
+                await media_downloader.download(
+                    url, output_path, headers=headers, on_progress=on_progress, resume_path=resume_path,
+                )
+                return self._check_downloaded(output_path)
+            except Exception as e:
+                logger.warning(f"⚠️  流式下载失败，改用浏览器下载: {e}")
             
-            logger.info(f"📥 开始下载: {url[:100]}...")
+            await self._ensure_browser()
+            async with self.browser_pool.acquire() as slot:
+                return await self._download_with_page(slot.page, url, output_path)
             
-            # 使用浏览器上下文下载，携带完整的请求头和 Cookie
-            response = await page.request.get(url, headers={
-                'Referer': 'https://www.douyin.com/',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            }, timeout=120000)  # 增加到 120 秒
+        except Exception as e:
+            logger.error(f"❌ 下载失败: {e}")
+            return False
+    
+    @staticmethod
+    def _check_downloaded(output_path: Path) -> bool:
+        """检查下载文件大小是否合理"""
+        if output_path.stat().st_size < 1024:  # 小于 1KB 可能是错误页面
+            logger.warning("⚠️  下载的文件太小，可能不是有效的视频")
+            return False
+        return True
+    
+    async def _download_with_page(self, page, url: str, output_path: Path) -> bool:
+        """在借出的页面上下载资源（整块读入内存，仅作为备用方案）"""
+        logger.info(f"📥 开始下载: {url[:100]}...")
+        
+        # 使用浏览器上下文下载，携带完整的请求头和 Cookie
+        response = await page.request.get(url, headers={
+            'Referer': 'https://www.douyin.com/',
+            'User-Agent': self.USER_AGENT,
+        }, timeout=120000)  # 增加到 120 秒
+        
+        if response.status != 200:
+            logger.error(f"❌ 下载失败: HTTP {response.status}")
             
-            if response.status != 200:
-                logger.error(f"❌ 下载失败: HTTP {response.status}")
-                
-                # 尝试备用方案：直接在页面中下载
-                logger.info("🔄 尝试备用下载方案...")
+            # 尝试备用方案：直接在页面中下载
+            logger.info("🔄 尝试备用下载方案...")
+            try:
+                await page.goto(url, wait_until='commit')
                 try:
-                    await page.goto(url)
-                    await page.wait_for_timeout(3000)
-                    
-                    # 获取页面内容
-                    content = await page.content()
-                    if len(content) > 1000:  # 简单判断是否是视频内容
-                        output_path.parent.mkdir(parents=True, exist_ok=True)
-                        with open(output_path, 'wb') as f:
-                            f.write(content.encode())
-                        logger.info(f"✅ 备用方案下载完成")
-                        await page.close()
-                        return True
-                except Exception as e2:
-                    logger.error(f"备用方案也失败: {e2}")
+                    await page.wait_for_load_state('load', timeout=3000)
+                except Exception:
+                    pass  # 超时也继续读取已有内容
                 
-                await page.close()
-                return False
-            
-            # 保存文件
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, 'wb') as f:
-                f.write(await response.body())
-            
-            file_size = output_path.stat().st_size
-            logger.info(f"✅ 下载完成: {output_path} ({file_size / 1024 / 1024:.2f} MB)")
+                # 获取页面内容
+                content = await page.content()
+                if len(content) > 1000:  # 简单判断是否是视频内容
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(output_path, 'wb') as f:
+                        f.write(content.encode())
+                    logger.info(f"✅ 备用方案下载完成")
+                    return True
+            except Exception as e2:
+                logger.error(f"备用方案也失败: {e2}")
             
-            await page.close()
-            
-            # 检查文件大小是否合理
-            if file_size < 1024:  # 小于 1KB 可能是错误页面
-                logger.warning("⚠️  下载的文件太小，可能不是有效的视频")
-                return False
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ 下载失败: {e}")
             return False
+        
+        # 保存文件
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(await response.body())
+        
+        file_size = output_path.stat().st_size
+        logger.info(f"✅ 下载完成: {output_path} ({file_size / 1024 / 1024:.2f} MB)")
+        
+        return self._check_downloaded(output_path)
     
-    async def fetch_and_download(self, url: str) -> Tuple[Optional[Path], Optional[VideoInfo]]:
+    async def fetch_and_download(
+        self,
+        url: str,
+        on_progress: Optional[ProgressCallback] = None,
+        media_policy: Optional[MediaPolicy] = None,
+    ) -> Tuple[Optional[Path], Optional[VideoInfo]]:
         """
         完整流程: 获取信息并下载视频
         
@@ -316,7 +588,7 @@ class BrowserFetcher:
             (video_path, video_info) 或 (None, None)
         """
         # 1. 获取视频 URL 和信息
-        video_url, video_info = await self.fetch_video_info(url)
+        video_url, video_info, cookies = await self._resolve(url, media_policy)
         
         if not video_url:
             logger.error("❌ 无法获取视频 URL")
@@ -335,23 +607,65 @@ class BrowserFetcher:
                 cover_url="",
             )
         
-        # 2. 下载视频
-        output_path = settings.temp_dir / f"{video_info.video_id}.mp4"
-        success = await self.download_resource(video_url, output_path)
+        # 2. 下载视频（纯音频流保存为 .m4a）
+        # 断点按视频共用，输出文件按任务命名：同一视频的并发任务各自提取、清理自己的文件
+        suffix = '.m4a' if video_info.rendition and video_info.rendition.kind == 'audio' else '.mp4'
+        resume_path = settings.temp_dir / f"{video_info.video_id}{suffix}"
+        output_path = settings.temp_dir / f"{video_info.video_id}-{uuid.uuid4().hex[:8]}{suffix}"
+        success = await self.download_resource(
+            video_url, output_path, on_progress=on_progress, cookies=cookies, resume_path=resume_path,
+        )
         
         if not success:
+            # 地址可能已失效，下次重新解析
+            media_cache.invalidate(video_info.video_id)
+            output_path.unlink(missing_ok=True)
             return None, video_info
         
         return output_path, video_info
     
+    async def open_stream(
+        self,
+        url: str,
+        on_progress: Optional[ProgressCallback] = None,
+        media_policy: Optional[MediaPolicy] = None,
+    ) -> Tuple[Optional[AsyncIterator[bytes]], Optional[VideoInfo]]:
+        """
+        获取信息并打开媒体数据流（不写临时文件）
+        
+        Returns:
+            (字节块异步迭代器, video_info)，获取不到地址时迭代器为 None
+        """
+        video_url, video_info, cookies = await self._resolve(url, media_policy)
+        if not video_url:
+            logger.error("❌ 无法获取视频 URL")
+            return None, video_info
+        
+        headers = self.get_request_headers(video_url, cookies)
+        return media_downloader.iter_bytes(video_url, headers=headers, on_progress=on_progress), video_info
+    
+    def stats(self) -> dict:
+        """浏览器池、资源拦截与缓存指标"""
+        return {
+            "browser_pool": self.browser_pool.stats() if self.browser_pool else {},
+            "resource_blocker": self.resource_blocker.stats() if self.resource_blocker else {},
+            "http_fast_path": http_fetcher.stats(),
+            "media_cache": media_cache.stats(),
+        }
+    
     async def close(self):
         """关闭浏览器"""
-        if self.context:
-            await self.context.close()
-        if self.browser:
-            await self.browser.close()
+        await self.session_store.stop()
+        if self.browser_pool:
+            try:
+                await self.save_session()
+            except Exception as e:
+                logger.warning(f"保存浏览器会话失败: {e}")
+            await self.browser_pool.close()
+            self.browser_pool = None
         if self.playwright:
             await self.playwright.stop()
+            self.playwright = None
         logger.info("🔒 浏览器已关闭")
 
 
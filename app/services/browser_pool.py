@@ -0,0 +1,272 @@
+"""
+多浏览器实例池
+启动 N 个相互独立的 Chromium 实例（各自拥有页面池），按最少负载分配任务
+实例在处理页面数或内存占用超过阈值后自动回收重启，崩溃后自动拉起
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+from app.services.page_pool import PagePool, PooledPage
+
+logger = logging.getLogger(__name__)
+
+# 根据浏览器实例创建页面池槽位的工厂函数
+SlotFactory = Callable[[Any], Awaitable[PooledPage]]
+
+
+class BrowserWorker:
+    """单个浏览器实例及其页面池"""
+
+    # 两次内存检查的最短间隔（秒），扫描进程表有一定开销
+    RSS_CHECK_INTERVAL = 30.0
+
+    def __init__(
+        self,
+        index: int,
+        playwright,
+        slot_factory: SlotFactory,
+        launch_args: List[str],
+        pool_size: int,
+        page_max_uses: int,
+        max_pages: int,
+        max_rss_mb: int,
+    ):
+        self.index = index
+        self._playwright = playwright
+        self._slot_factory = slot_factory
+        self._launch_args = launch_args
+        self._pool_size = pool_size
+        self._page_max_uses = page_max_uses
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+
+        self.browser = None
+        self.page_pool: Optional[PagePool] = None
+        self.generation = 0
+        self.alive = False
+        self.draining = False
+        self.active = 0
+        self.pages_served = 0
+        self.restarts = 0
+        self.started_at = 0.0
+        self._rss_mb: Optional[float] = None
+        self._rss_checked_at = 0.0
+        self._process = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def marker(self) -> str:
+        """写入 Chromium 命令行的标记，用于在进程表中找到本实例"""
+        return f"--douyin-browser-worker={os.getpid()}-{self.index}-{self.generation}"
+
+    async def start(self, warmup: bool = False):
+        self.generation += 1
+        self.browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=self._launch_args + [self.marker],
+        )
+        browser = self.browser
+        browser.on('disconnected', lambda _: self._on_disconnected(browser))
+        self.page_pool = PagePool(
+            lambda: self._slot_factory(browser),
+            size=self._pool_size,
+            max_uses=self._page_max_uses,
+        )
+        self.alive = True
+        self.draining = False
+        self.pages_served = 0
+        self.started_at = time.monotonic()
+        self._process = None
+        self._rss_mb = None
+        if warmup:
+            await self.page_pool.warmup()
+        logger.info(f"✅ 浏览器实例 #{self.index} 已启动 (第 {self.generation} 代)")
+
+    def _on_disconnected(self, browser):
+        # 只处理当前这一代浏览器的断开事件（回收时主动关闭的旧实例忽略）
+        if browser is self.browser and self.alive:
+            logger.warning(f"⚠️  浏览器实例 #{self.index} 已断开，将在下次使用时重启")
+            self.alive = False
+
+    async def stop(self):
+        self.alive = False
+        if self.page_pool:
+            await self.page_pool.close()
+            self.page_pool = None
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                logger.debug(f"关闭浏览器实例 #{self.index} 失败: {e}")
+            self.browser = None
+
+    async def restart(self, warmup: bool = False):
+        """关闭并重新启动（同一时刻只允许一个重启）"""
+        async with self._lock:
+            if self.alive and not self.draining:
+                return
+            # 排空期间又被分配了任务，等这些任务结束后再重启
+            if self.alive and self.active > 0:
+                return
+            await self.stop()
+            self.restarts += 1
+            await self.start(warmup=warmup)
+
+    def rss_mb(self) -> Optional[float]:
+        """
+        浏览器进程树的常驻内存（MB）
+
+        依赖可选的 psutil，未安装时返回 None（仅按页面数回收）
+        """
+        now = time.monotonic()
+        if now - self._rss_checked_at < self.RSS_CHECK_INTERVAL:
+            return self._rss_mb
+        self._rss_checked_at = now
+
+        try:
+            import psutil
+        except ImportError:
+            return None
+
+        try:
+            if self._process is None or not self._process.is_running():
+                self._process = None
+                for proc in psutil.process_iter(['cmdline']):
+                    if self.marker in (proc.info.get('cmdline') or []):
+                        self._process = proc
+                        break
+            if self._process is None:
+                return None
+            procs = [self._process] + self._process.children(recursive=True)
+            total = 0
+            for proc in procs:
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    pass
+            self._rss_mb = total / 1024 / 1024
+        except psutil.Error as e:
+            logger.debug(f"读取浏览器内存失败: {e}")
+            self._process = None
+        return self._rss_mb
+
+    def needs_recycle(self) -> bool:
+        if self.max_pages and self.pages_served >= self.max_pages:
+            return True
+        rss = self.rss_mb() if self.max_rss_mb else None
+        return bool(rss and rss >= self.max_rss_mb)
+
+    def stats(self) -> dict:
+        return {
+            "index": self.index,
+            "generation": self.generation,
+            "alive": self.alive,
+            "draining": self.draining,
+            "active": self.active,
+            "pages_served": self.pages_served,
+            "restarts": self.restarts,
+            "rss_mb": round(self._rss_mb, 1) if self._rss_mb is not None else None,
+            "uptime": round(time.monotonic() - self.started_at, 1) if self.alive else 0,
+            "page_pool": self.page_pool.stats() if self.page_pool else {},
+        }
+
+
+class BrowserPool:
+    """
+    多浏览器实例池
+
+    1. 新任务分配给活跃任务最少的实例
+    2. 实例处理页面数达到 max_pages 或内存超过 max_rss_mb 后进入排空状态，
+       不再接新任务，现有任务结束后重启
+    3. 浏览器崩溃断开后，下次分配到该实例时自动重启
+    """
+
+    def __init__(
+        self,
+        playwright,
+        slot_factory: SlotFactory,
+        launch_args: List[str],
+        size: int = 1,
+        pool_size: int = 3,
+        page_max_uses: int = 50,
+        max_pages: int = 500,
+        max_rss_mb: int = 0,
+    ):
+        self.workers = [
+            BrowserWorker(
+                index=i,
+                playwright=playwright,
+                slot_factory=slot_factory,
+                launch_args=launch_args,
+                pool_size=pool_size,
+                page_max_uses=page_max_uses,
+                max_pages=max_pages,
+                max_rss_mb=max_rss_mb,
+            )
+            for i in range(max(1, size))
+        ]
+        self._recycle_tasks: set = set()
+
+    async def start(self, warmup: bool = False):
+        await asyncio.gather(*[w.start(warmup=warmup) for w in self.workers])
+
+    def _pick(self) -> BrowserWorker:
+        """选择负载最低的实例，优先未排空的实例"""
+        candidates = [w for w in self.workers if not w.draining] or self.workers
+        return min(candidates, key=lambda w: (not w.alive, w.active))
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PooledPage]:
+        """借出一个页面槽位"""
+        worker = self._pick()
+        worker.active += 1
+        served = False
+        try:
+            if not worker.alive:
+                await worker.restart()
+            async with worker.page_pool.acquire() as slot:
+                served = True
+                yield slot
+        finally:
+            worker.active -= 1
+            if served:
+                worker.pages_served += 1
+            self._maybe_recycle(worker)
+
+    def _maybe_recycle(self, worker: BrowserWorker):
+        if not worker.draining and worker.alive and worker.needs_recycle():
+            logger.info(
+                f"♻️  浏览器实例 #{worker.index} 达到回收阈值 "
+                f"(页面 {worker.pages_served}, 内存 {worker.rss_mb() or 0:.0f} MB)，排空后重启"
+            )
+            worker.draining = True
+        if worker.draining and worker.active == 0:
+            task = asyncio.ensure_future(worker.restart(warmup=True))
+            self._recycle_tasks.add(task)
+            task.add_done_callback(self._recycle_tasks.discard)
+
+    def contexts(self) -> List[Any]:
+        """所有存活实例中的 BrowserContext"""
+        return [
+            context
+            for w in self.workers if w.alive and w.page_pool
+            for context in w.page_pool.contexts()
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "instances": len(self.workers),
+            "alive": sum(1 for w in self.workers if w.alive),
+            "active": sum(w.active for w in self.workers),
+            "workers": [w.stats() for w in self.workers],
+        }
+
+    async def close(self):
+        for task in list(self._recycle_tasks):
+            task.cancel()
+        await asyncio.gather(*[w.stop() for w in self.workers], return_exceptions=True)
@@ -7,10 +7,11 @@ import asyncio
 import logging
 import re
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import AsyncIterator, List, Optional, Tuple
 
 from app.config import settings
-from app.models.schemas import VideoInfo
+from app.models.schemas import MediaPolicy, MediaRendition, VideoInfo
+from app.services.media_downloader import ProgressCallback
 
 logger = logging.getLogger(__name__)
 
@@ -82,11 +83,87 @@ class DouyinParser:
                 return match.group(1)
         return None
 
-    async def download_video(self, url: str, output_dir: Optional[Path] = None) -> Tuple[Path, VideoInfo]:
+    def parse_aweme(self, item: dict, url: str = "") -> Tuple[VideoInfo, List[MediaRendition]]:
+        """
+        解析抖音作品数据（分享页 _ROUTER_DATA 的 item_list 或 aweme/detail 接口的 aweme_detail）
+
+        Returns:
+            (视频信息, 全部候选媒体版本)
+        """
+        video = item.get('video') or {}
+        video_id = str(item.get('aweme_id') or self.extract_video_id(url) or 'unknown')
+
+        # 时长单位为毫秒，部分接口只在作品层级提供
+        duration_ms = video.get('duration') or item.get('duration') or 0
+        cover = video.get('cover') or video.get('origin_cover') or {}
+
+        video_info = VideoInfo(
+            video_id=video_id,
+            title=(item.get('desc') or '').strip() or f"抖音视频 {video_id}",
+            author=(item.get('author') or {}).get('nickname') or "未知作者",
+            duration=round(duration_ms / 1000, 3),
+            url=url,
+            cover_url=_first_url(cover),
+        )
+
+        renditions: List[MediaRendition] = []
+        play_addr = video.get('play_addr') or {}
+        if _first_url(play_addr):
+            renditions.append(MediaRendition(
+                # playwm 为带水印地址，play 为无水印原始地址
+                url=_first_url(play_addr).replace('/playwm/', '/play/'),
+                kind='video',
+                size=int(play_addr.get('data_size') or 0),
+                mime_type='video/mp4',
+            ))
+
+        for rate in video.get('bit_rate') or []:
+            addr = rate.get('play_addr') or {}
+            if _first_url(addr):
+                renditions.append(MediaRendition(
+                    url=_first_url(addr),
+                    kind='video',
+                    bitrate=int(rate.get('bit_rate') or 0),
+                    size=int(addr.get('data_size') or 0),
+                    mime_type='video/mp4',
+                ))
+
+        # 网页版详情接口提供 DASH 纯音频流
+        for rate in video.get('bit_rate_audio') or []:
+            meta = rate.get('audio_meta') or {}
+            url_list = meta.get('url_list') or {}
+            if isinstance(url_list, dict):
+                audio_url = url_list.get('main_url') or url_list.get('backup_url')
+            else:
+                audio_url = _first_url(meta)
+            if audio_url:
+                renditions.append(MediaRendition(
+                    url=audio_url,
+                    kind='audio',
+                    bitrate=int(meta.get('bitrate') or 0),
+                    size=int(meta.get('size') or 0),
+                    mime_type=meta.get('mime_type') or 'audio/mp4',
+                ))
+
+        return video_info, renditions
+
+    async def download_video(
+        self,
+        url: str,
+        output_dir: Optional[Path] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        media_policy: Optional[MediaPolicy] = None,
+    ) -> Tuple[Path, VideoInfo]:
         """
         使用浏览器自动化下载视频
         
         完全模拟真实浏览器行为，绕过所有反爬限制
+        
+        Args:
+            url: 抖音视频链接
+            output_dir: 输出目录（可选）
+            on_progress: 下载进度回调 (已下载字节, 总字节)
+            media_policy: 媒体版本选择策略
         """
         output_dir = output_dir or settings.temp_dir
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -97,7 +174,9 @@ class DouyinParser:
             from app.services.browser_fetcher import browser_fetcher
             
             # 使用浏览器自动化获取并下载
-            video_path, video_info = await browser_fetcher.fetch_and_download(url)
+            video_path, video_info = await browser_fetcher.fetch_and_download(
+                url, on_progress=on_progress, media_policy=media_policy
+            )
             
             if not video_path or not video_path.exists():
                 raise RuntimeError("浏览器自动化下载失败")
@@ -117,6 +196,48 @@ class DouyinParser:
             logger.error(f"❌ 下载失败: {e}")
             raise
 
+    async def stream_video(
+        self,
+        url: str,
+        on_progress: Optional[ProgressCallback] = None,
+        media_policy: Optional[MediaPolicy] = None,
+    ) -> Tuple[AsyncIterator[bytes], VideoInfo]:
+        """
+        解析媒体地址并返回下载数据流（不落盘），用于直接送入 ffmpeg
+
+        Returns:
+            (字节块异步迭代器, 视频信息)
+        """
+        from app.services.browser_fetcher import browser_fetcher
+
+        chunks, video_info = await browser_fetcher.open_stream(
+            url, on_progress=on_progress, media_policy=media_policy
+        )
+        if chunks is None:
+            raise RuntimeError("无法获取视频 URL")
+        return chunks, video_info or _fallback_info(url, self.extract_video_id(url))
+
+
+def _fallback_info(url: str, video_id: Optional[str]) -> VideoInfo:
+    """无法获取视频信息时使用的基本信息"""
+    return VideoInfo(
+        video_id=video_id or "unknown",
+        title=f"抖音视频 {video_id}" if video_id else "未知视频",
+        author="未知作者",
+        duration=0,
+        url=url,
+        cover_url="",
+    )
+
+
+def _first_url(addr: dict) -> str:
+    """取 {url_list: [...]} 结构中的第一个地址"""
+    url_list = addr.get('url_list') if isinstance(addr, dict) else None
+    if not url_list or not isinstance(url_list, list):
+        return ""
+    url = url_list[0]
+    return f"https:{url}" if url.startswith('//') else url
+
 
 # 全局单例
 douyin_parser = DouyinParser()
@@ -0,0 +1,115 @@
+"""
+HTTP 快速解析器
+不启动浏览器，直接请求分享页并解析页面内嵌的 _ROUTER_DATA JSON 获取播放地址和视频信息
+失败时由 BrowserFetcher 回退到 Playwright
+"""
+
+import json
+import logging
+import re
+from typing import List, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+from app.models.schemas import MediaRendition, VideoInfo
+from app.services.douyin_parser import douyin_parser
+
+logger = logging.getLogger(__name__)
+
+SHARE_PAGE_URL = "https://www.iesdouyin.com/share/video/{video_id}/"
+# 分享页只对移动端 UA 返回服务端渲染的数据
+MOBILE_USER_AGENT = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1"
+)
+ROUTER_DATA_RE = re.compile(r"window\._ROUTER_DATA\s*=\s*(\{.*?\})\s*</script>", re.S)
+
+
+def parse_share_page(html: str) -> Optional[dict]:
+    """从分享页 HTML 中取出作品数据（item_list 的第一项），解析不到返回 None"""
+    match = ROUTER_DATA_RE.search(html)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(1))
+    except ValueError:
+        return None
+
+    for page in (data.get("loaderData") or {}).values():
+        if not isinstance(page, dict):
+            continue
+        items = ((page.get("videoInfoRes") or {}).get("item_list")) or []
+        if items:
+            return items[0]
+    return None
+
+
+class HTTPFetcher:
+    """基于 httpx 的轻量解析器，统计命中/未命中次数"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=settings.request_timeout,
+                headers={"User-Agent": MOBILE_USER_AGENT, "Referer": "https://www.douyin.com/"},
+            )
+        return self._client
+
+    async def resolve_video_id(self, url: str) -> Optional[str]:
+        """解析视频 ID，短链通过跳转后的地址获取"""
+        video_id = douyin_parser.extract_video_id(url)
+        if video_id:
+            return video_id
+        response = await self._get_client().get(url)
+        return douyin_parser.extract_video_id(str(response.url))
+
+    async def fetch(self, url: str) -> Tuple[Optional[VideoInfo], List[MediaRendition]]:
+        """
+        请求分享页并解析
+
+        Returns:
+            (video_info, renditions)，失败时为 (None, [])
+        """
+        try:
+            video_id = await self.resolve_video_id(url)
+            if not video_id:
+                raise ValueError("无法解析视频 ID")
+
+            response = await self._get_client().get(SHARE_PAGE_URL.format(video_id=video_id))
+            response.raise_for_status()
+
+            item = parse_share_page(response.text)
+            if not item:
+                raise ValueError("分享页中没有作品数据")
+
+            video_info, renditions = douyin_parser.parse_aweme(item, url)
+            if not renditions:
+                raise ValueError("作品数据中没有播放地址")
+
+            self.hits += 1
+            logger.info(f"⚡ HTTP 快速解析成功: {video_info.title} - {video_info.author}")
+            return video_info, renditions
+
+        except Exception as e:
+            self.misses += 1
+            logger.info(f"HTTP 快速解析失败，回退到浏览器: {e}")
+            return None, []
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# 全局单例
+http_fetcher = HTTPFetcher()
@@ -0,0 +1,166 @@
+"""
+媒体地址缓存
+按 video_id 缓存解析出的媒体地址和视频信息，重复提交/重试时无需再次启动浏览器
+缓存有效期取自签名 URL 中的过期时间，支持 LRU 淘汰和可选的磁盘持久化
+"""
+
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from pydantic import BaseModel, Field
+
+from app.config import settings
+from app.models.schemas import MediaRendition, VideoInfo
+
+logger = logging.getLogger(__name__)
+
+# 查询参数中常见的过期时间字段（Unix 时间戳）
+EXPIRY_PARAMS = ('x-expires', 'expires', 'x-oss-expires', 'deadline', 'expire')
+# 抖音 CDN 路径中的十六进制过期时间: /<签名>/<8 位十六进制时间戳>/video/...
+HEX_EXPIRY_RE = re.compile(r'^[0-9a-f]{8}$')
+# 过期前预留的安全时间（秒），避免拿到即将失效的地址
+EXPIRY_MARGIN = 60
+
+
+def parse_url_expiry(url: str, now: Optional[float] = None) -> Optional[float]:
+    """从签名 URL 中解析过期时间戳，解析不到返回 None"""
+    now = now or time.time()
+    parts = urlsplit(url)
+
+    query = parse_qs(parts.query)
+    for name in EXPIRY_PARAMS:
+        values = query.get(name)
+        if values and values[0].isdigit():
+            return float(values[0])
+
+    for segment in parts.path.split('/'):
+        if HEX_EXPIRY_RE.match(segment):
+            ts = int(segment, 16)
+            # 只接受合理范围内的时间戳，避免把普通十六进制串误判为时间
+            if now - 86400 < ts < now + 30 * 86400:
+                return float(ts)
+    return None
+
+
+class CachedMedia(BaseModel):
+    """一条缓存记录"""
+    video_info: VideoInfo
+    renditions: List[MediaRendition] = Field(default_factory=list)
+    expires_at: float = 0.0
+
+
+class MediaURLCache:
+    """video_id -> (视频信息, 媒体版本列表) 的 LRU 缓存"""
+
+    def __init__(self, max_entries: int = 512, default_ttl: float = 600, store_path: Optional[Path] = None):
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        self.store_path = store_path
+        self._entries: "OrderedDict[str, CachedMedia]" = OrderedDict()
+        # 原始链接（如短链）-> video_id
+        self._aliases: Dict[str, str] = {}
+        self._hits = 0
+        self._misses = 0
+        self._load()
+
+    def ttl_for(self, renditions: List[MediaRendition]) -> float:
+        """根据签名 URL 的最早过期时间计算缓存有效期，上限为 default_ttl"""
+        now = time.time()
+        expiries = [e for e in (parse_url_expiry(r.url, now) for r in renditions) if e]
+        if not expiries:
+            return self.default_ttl
+        return max(0.0, min(self.default_ttl, min(expiries) - now - EXPIRY_MARGIN))
+
+    def get(self, key: Optional[str]) -> Optional[CachedMedia]:
+        """按 video_id 或原始链接查询，过期记录会被删除"""
+        if not key:
+            return None
+        video_id = self._aliases.get(key, key)
+        entry = self._entries.get(video_id)
+        if entry is None or entry.expires_at <= time.time():
+            if entry is not None:
+                self.invalidate(video_id)
+            self._misses += 1
+            return None
+        self._entries.move_to_end(video_id)
+        self._hits += 1
+        return entry
+
+    def put(self, video_info: VideoInfo, renditions: List[MediaRendition], alias: Optional[str] = None):
+        """写入缓存（有效期不足时直接跳过）"""
+        video_id = video_info.video_id
+        if not video_id or video_id == 'unknown' or not renditions:
+            return
+        ttl = self.ttl_for(renditions)
+        if ttl <= 0:
+            return
+
+        self._entries[video_id] = CachedMedia(
+            video_info=video_info.model_copy(update={'rendition': None}),
+            renditions=renditions,
+            expires_at=time.time() + ttl,
+        )
+        self._entries.move_to_end(video_id)
+        if alias and alias != video_id:
+            self._aliases[alias] = video_id
+
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        self._save()
+
+    def invalidate(self, video_id: Optional[str]):
+        """删除缓存（例如下载时地址已失效）"""
+        if video_id and video_id in self._entries:
+            self._drop(video_id)
+            self._save()
+
+    def _drop(self, video_id: str):
+        self._entries.pop(video_id, None)
+        for alias in [a for a, v in self._aliases.items() if v == video_id]:
+            del self._aliases[alias]
+
+    def _load(self):
+        if not self.store_path or not self.store_path.exists():
+            return
+        try:
+            data = json.loads(self.store_path.read_text(encoding='utf-8'))
+            now = time.time()
+            for video_id, raw in data.get('entries', {}).items():
+                entry = CachedMedia.model_validate(raw)
+                if entry.expires_at > now:
+                    self._entries[video_id] = entry
+            self._aliases = {a: v for a, v in data.get('aliases', {}).items() if v in self._entries}
+            logger.info(f"已加载媒体地址缓存: {len(self._entries)} 条")
+        except Exception as e:
+            logger.warning(f"读取媒体地址缓存失败: {e}")
+
+    def _save(self):
+        if not self.store_path:
+            return
+        try:
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.store_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps({
+                'entries': {k: v.model_dump() for k, v in self._entries.items()},
+                'aliases': self._aliases,
+            }, ensure_ascii=False), encoding='utf-8')
+            tmp_path.replace(self.store_path)
+        except Exception as e:
+            logger.warning(f"保存媒体地址缓存失败: {e}")
+
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'hits': self._hits, 'misses': self._misses}
+
+
+# 全局单例
+media_cache = MediaURLCache(
+    max_entries=settings.media_cache_size,
+    default_ttl=settings.media_cache_ttl,
+    store_path=Path(settings.media_cache_file) if settings.media_cache_file else None,
+)
@@ -0,0 +1,364 @@
+"""
+媒体流式下载服务
+使用 httpx 按固定大小分块写入磁盘，内存占用与文件大小无关
+大文件在服务器支持 Range 时拆分为多段并发下载
+支持 Range 的下载先写入 .part 文件并持久化各段进度，失败重试时从断点续传
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import weakref
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 下载进度回调: (已下载字节数, 总字节数或 None)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+def build_cookie_header(cookies: Iterable[dict], url: Optional[str] = None) -> str:
+    """
+    把 Playwright context.cookies() 的结果转换为 Cookie 请求头
+
+    给出 url 时只保留域名匹配该地址的 Cookie
+    """
+    host = (urlsplit(url).hostname or "") if url else None
+    parts = []
+    for c in cookies:
+        if not c.get("name"):
+            continue
+        if host is not None:
+            domain = c.get("domain", "").lstrip(".")
+            if not domain or not (host == domain or host.endswith("." + domain)):
+                continue
+        parts.append(f"{c['name']}={c['value']}")
+    return "; ".join(parts)
+
+
+def split_ranges(size: int, segments: int) -> List[Tuple[int, int]]:
+    """把 [0, size) 均分为若干闭区间字节范围"""
+    segments = max(1, min(segments, size))
+    step = size // segments
+    ranges = []
+    for i in range(segments):
+        start = i * step
+        end = size - 1 if i == segments - 1 else start + step - 1
+        ranges.append((start, end))
+    return ranges
+
+
+class DownloadCheckpoint:
+    """
+    断点记录（保存在 <文件>.part.json）
+
+    ranges 中每一项为 [start, end, done]，done 为该段已写入的字节数
+    通过文件总大小和 ETag 判断断点是否仍然对应同一个文件
+    """
+
+    SAVE_INTERVAL = 1.0  # 最短持久化间隔（秒）
+
+    def __init__(self, path: Path, size: int, etag: Optional[str], ranges: List[List[int]]):
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.ranges = ranges
+        self._saved_at = 0.0
+
+    @classmethod
+    def load(cls, path: Path, size: int, etag: Optional[str]) -> Optional["DownloadCheckpoint"]:
+        """读取断点，大小或 ETag 不一致时视为无效"""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("size") != size:
+            return None
+        if etag and data.get("etag") and data["etag"] != etag:
+            return None
+        return cls(path, size, etag, data["ranges"])
+
+    @property
+    def done(self) -> int:
+        return sum(r[2] for r in self.ranges)
+
+    def save(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._saved_at < self.SAVE_INTERVAL:
+            return
+        self._saved_at = now
+        self.path.write_text(
+            json.dumps({"size": self.size, "etag": self.etag, "ranges": self.ranges}),
+            encoding="utf-8",
+        )
+
+
+class MediaDownloader:
+    """流式媒体下载器（共享连接池，支持分段并发下载和断点续传）"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        # 每个断点文件一把锁：同一视频的并发任务共用 .part 断点，不能同时写
+        self._path_locks: "weakref.WeakValueDictionary[Path, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # 每个断点文件正在使用（下载中或排队）的任务数
+        self._path_users: Dict[Path, int] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=httpx.Timeout(settings.download_timeout, connect=settings.request_timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.max_concurrent_tasks * 4,
+                    max_keepalive_connections=settings.max_concurrent_tasks * 2,
+                ),
+            )
+        return self._client
+
+    async def probe(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[int], bool, Optional[str]]:
+        """
+        探测文件大小和 Range 支持
+
+        用 bytes=0-0 的 GET 代替 HEAD（部分 CDN 不支持 HEAD）
+
+        Returns:
+            (总字节数或 None, 是否支持 Range, ETag)
+        """
+        client = self._get_client()
+        probe_headers = dict(headers or {}, Range="bytes=0-0")
+        async with client.stream("GET", url, headers=probe_headers) as response:
+            response.raise_for_status()
+            etag = response.headers.get("etag")
+            if response.status_code == 206:
+                match = re.search(r"/(\d+)$", response.headers.get("content-range", ""))
+                return (int(match.group(1)) if match else None), bool(match), etag
+            return int(response.headers.get("content-length") or 0) or None, False, etag
+
+    async def download(
+        self,
+        url: str,
+        output_path: Path,
+        headers: Optional[Dict[str, str]] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        resume_path: Optional[Path] = None,
+    ) -> int:
+        """
+        下载到文件
+
+        服务器支持 Range 时写入 .part 文件并记录断点，网络错误会按 download_retries
+        重试并从断点继续；文件足够大时分段并发下载。不支持 Range 时单连接流式下载
+
+        Args:
+            url: 媒体地址
+            output_path: 输出文件路径
+            headers: 请求头（含 Referer / User-Agent / Cookie）
+            on_progress: 进度回调
+            resume_path: 断点文件对应的路径（按视频命名，各任务共用），留空时与 output_path 相同。
+                output_path 按任务命名时，下载完成后从 .part 硬链接过去，
+                之后同一视频的其他任务覆盖或删除文件都不会影响本任务
+
+        Returns:
+            写入的字节数
+        """
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        resume_path = resume_path or output_path
+
+        key = resume_path.resolve()
+        lock = self._path_locks.get(key)
+        if lock is None:
+            lock = self._path_locks[key] = asyncio.Lock()
+        self._path_users[key] = self._path_users.get(key, 0) + 1
+        try:
+            async with lock:
+                return await self._download(url, output_path, resume_path, headers, on_progress)
+        finally:
+            self._path_users[key] -= 1
+            if not self._path_users[key]:
+                del self._path_users[key]
+
+    async def _download(
+        self,
+        url: str,
+        output_path: Path,
+        resume_path: Path,
+        headers: Optional[Dict[str, str]],
+        on_progress: Optional[ProgressCallback],
+    ) -> int:
+        try:
+            size, ranged, etag = await self.probe(url, headers)
+        except httpx.HTTPError as e:
+            logger.debug(f"Range 探测失败，使用单连接下载: {e}")
+            size, ranged, etag = None, False, None
+
+        if not (ranged and size):
+            return await self._download_single(url, output_path, headers, on_progress)
+
+        attempts = max(1, settings.download_retries + 1)
+        for attempt in range(1, attempts + 1):
+            try:
+                return await self._download_resumable(url, output_path, resume_path, size, etag, headers, on_progress)
+            except (httpx.HTTPError, RuntimeError) as e:
+                if attempt >= attempts:
+                    raise
+                logger.warning(f"⚠️  下载中断（第 {attempt} 次），{2 ** attempt}s 后断点续传: {e}")
+                await asyncio.sleep(2 ** attempt)
+
+    async def _download_single(
+        self,
+        url: str,
+        output_path: Path,
+        headers: Optional[Dict[str, str]],
+        on_progress: Optional[ProgressCallback],
+    ) -> int:
+        """单连接流式下载"""
+        client = self._get_client()
+        async with client.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            total = int(response.headers.get("content-length") or 0) or None
+            written = 0
+            with open(output_path, "wb") as f:
+                async for chunk in response.aiter_bytes(settings.download_chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+                    if on_progress:
+                        on_progress(written, total)
+
+        logger.info(f"✅ 流式下载完成: {output_path.name} ({written / 1024 / 1024:.2f} MB)")
+        return written
+
+    async def iter_bytes(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> AsyncIterator[bytes]:
+        """单连接流式读取，逐块产出数据（不写磁盘）"""
+        client = self._get_client()
+        async with client.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            total = int(response.headers.get("content-length") or 0) or None
+            received = 0
+            async for chunk in response.aiter_bytes(settings.download_chunk_size):
+                received += len(chunk)
+                if on_progress:
+                    on_progress(received, total)
+                yield chunk
+
+    @staticmethod
+    def part_paths(output_path: Path) -> Tuple[Path, Path]:
+        """断点续传使用的 (.part 数据文件, .part.json 断点记录)"""
+        part_path = output_path.with_name(output_path.name + ".part")
+        return part_path, output_path.with_name(output_path.name + ".part.json")
+
+    async def _download_resumable(
+        self,
+        url: str,
+        output_path: Path,
+        resume_path: Path,
+        size: int,
+        etag: Optional[str],
+        headers: Optional[Dict[str, str]],
+        on_progress: Optional[ProgressCallback],
+    ) -> int:
+        """按字节范围（可能多段并发）下载到 .part 文件，完成后改名或链接为目标文件"""
+        part_path, checkpoint_path = self.part_paths(resume_path)
+
+        checkpoint = None
+        if part_path.exists():
+            checkpoint = DownloadCheckpoint.load(checkpoint_path, size, etag)
+        if checkpoint is None:
+            segments = settings.download_segments if size >= settings.download_segment_min_size else 1
+            ranges = [[start, end, 0] for start, end in split_ranges(size, segments)]
+            checkpoint = DownloadCheckpoint(checkpoint_path, size, etag, ranges)
+            # 预分配文件，各分段写入各自的偏移位置
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+            checkpoint.save(force=True)
+            logger.info(f"📥 分段下载: {output_path.name} ({size / 1024 / 1024:.2f} MB, {len(ranges)} 段)")
+        else:
+            logger.info(
+                f"📥 断点续传: {output_path.name} "
+                f"(已完成 {checkpoint.done / 1024 / 1024:.2f}/{size / 1024 / 1024:.2f} MB)"
+            )
+
+        async def _fetch(segment: List[int]):
+            start, end, done = segment
+            if start + done > end:
+                return
+            client = self._get_client()
+            range_headers = dict(headers or {}, Range=f"bytes={start + done}-{end}")
+            async with client.stream("GET", url, headers=range_headers) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise RuntimeError(f"服务器未按 Range 返回: HTTP {response.status_code}")
+                with open(part_path, "r+b") as f:
+                    f.seek(start + segment[2])
+                    async for chunk in response.aiter_bytes(settings.download_chunk_size):
+                        f.write(chunk)
+                        # 先落盘再记录进度，保证断点不超前于文件内容
+                        f.flush()
+                        segment[2] += len(chunk)
+                        checkpoint.save()
+                        if on_progress:
+                            on_progress(checkpoint.done, size)
+            if start + segment[2] != end + 1:
+                raise RuntimeError(f"分段 {start}-{end} 不完整: 收到 {segment[2]} 字节")
+
+        tasks = [asyncio.ensure_future(_fetch(segment)) for segment in checkpoint.ranges]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # 任一分段失败时停止其余分段，避免重试时与残留任务并发写同一位置
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            checkpoint.save(force=True)
+
+        if output_path == resume_path:
+            part_path.replace(output_path)
+            checkpoint_path.unlink(missing_ok=True)
+        else:
+            output_path.unlink(missing_ok=True)
+            try:
+                os.link(part_path, output_path)
+            except OSError:
+                shutil.copyfile(part_path, output_path)
+            # 同一视频还有任务在排队时保留已完成的 .part，它们无需重新下载
+            if self._path_users.get(resume_path.resolve(), 0) <= 1:
+                part_path.unlink(missing_ok=True)
+                checkpoint_path.unlink(missing_ok=True)
+
+        logger.info(f"✅ 分段下载完成: {output_path.name} ({size / 1024 / 1024:.2f} MB)")
+        return size
+
+    @staticmethod
+    def clean_stale_parts(directory: Path, max_age: float):
+        """清理超过 max_age 秒未更新的断点文件"""
+        now = time.time()
+        for path in list(directory.glob("*.part")) + list(directory.glob("*.part.json")):
+            try:
+                if now - path.stat().st_mtime > max_age:
+                    path.unlink()
+            except OSError:
+                pass
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# 全局单例
+media_downloader = MediaDownloader()
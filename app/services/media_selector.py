@@ -0,0 +1,83 @@
+"""
+媒体版本选择
+从页面捕获到的多个视频/音频地址中，按策略挑选实际要下载的版本
+"""
+
+import logging
+from typing import Callable, Iterable, List, Optional
+
+from app.models.schemas import MediaPolicy, MediaRendition
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = ('.m4a', '.mp3', '.aac')
+VIDEO_EXTENSIONS = ('.mp4',)
+
+
+def classify_media(url: str, mime_type: str = "") -> Optional[str]:
+    """判断资源是音频还是视频，无法判断返回 None"""
+    lower = url.lower()
+    # 抖音 DASH 纯音频流的 URL 中带有 media-audio 标记
+    if 'audio/' in mime_type or 'media-audio' in lower or any(ext in lower for ext in AUDIO_EXTENSIONS):
+        return "audio"
+    if 'video/' in mime_type or any(ext in lower for ext in VIDEO_EXTENSIONS):
+        return "video"
+    return None
+
+
+UNKNOWN = 2 ** 62
+
+
+def _weigher(candidates: List[MediaRendition], duration: float = 0.0) -> Callable[[MediaRendition], float]:
+    """
+    衡量版本体积的排序键（同一批候选只用一种单位比较，未知的排在最后）
+
+    1. 全部已知大小时按大小（字节）
+    2. 已知时长时把码率换算为字节：bitrate * duration / 8
+    3. 全部已知码率时按码率
+    4. 否则按已知数量更多的那种单位
+    """
+    if all(c.size for c in candidates):
+        return lambda c: c.size
+    if duration > 0:
+        return lambda c: c.size or (c.bitrate * duration / 8 if c.bitrate else UNKNOWN)
+    sized = sum(1 for c in candidates if c.size)
+    rated = sum(1 for c in candidates if c.bitrate)
+    if rated >= sized:
+        return lambda c: c.bitrate or UNKNOWN
+    return lambda c: c.size or UNKNOWN
+
+
+def select_rendition(
+    candidates: Iterable[MediaRendition],
+    policy: MediaPolicy = MediaPolicy.AUDIO,
+    duration: float = 0.0,
+) -> Optional[MediaRendition]:
+    """
+    按策略选择媒体版本
+
+    - audio:   优先纯音频流（体积最小的一个），没有时退化为 lowest
+    - lowest:  体积最小的版本
+    - highest: 体积最大的视频（原有行为），没有视频时取音频
+
+    Args:
+        duration: 视频时长（秒），用于把码率换算为字节，与只知道大小的版本比较
+    """
+    candidates: List[MediaRendition] = list(candidates)
+    if not candidates:
+        return None
+
+    audios = [c for c in candidates if c.kind == "audio"]
+    videos = [c for c in candidates if c.kind == "video"]
+
+    if policy == MediaPolicy.HIGHEST:
+        if videos:
+            weight = _weigher(videos, duration)
+            # 未知体积的版本排在最后
+            return max(videos, key=lambda c: -1 if weight(c) == UNKNOWN else weight(c))
+        return audios[0] if audios else candidates[0]
+
+    if policy == MediaPolicy.AUDIO and audios:
+        return min(audios, key=_weigher(audios, duration))
+
+    return min(candidates, key=_weigher(candidates, duration))
@@ -0,0 +1,165 @@
+"""
+浏览器页面池
+预热并复用 Playwright 的 BrowserContext / Page，避免每个视频都重新创建页面和加载 JS 运行时
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledPage:
+    """池中的一个槽位：独立的 BrowserContext + 一个常驻 Page"""
+    context: Any
+    page: Any
+    uses: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class PagePool:
+    """
+    有界页面池
+
+    1. 最多同时存在 size 个槽位，超出的请求排队等待
+    2. 启动时可预热，提前创建好全部页面
+    3. 借出前做健康检查，坏掉的页面直接丢弃重建
+    4. 每个槽位使用 max_uses 次后回收，防止页面内存持续增长
+    """
+
+    HEALTH_CHECK_TIMEOUT = 2.0
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[PooledPage]],
+        size: int = 3,
+        max_uses: int = 50,
+    ):
+        self._factory = factory
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.size)
+        self._closed = False
+        self._in_use = 0
+        # 全部存活的槽位（空闲 + 借出中），用于汇总会话状态
+        self._live: Dict[int, PooledPage] = {}
+        self._stats = {"created": 0, "reused": 0, "recycled": 0, "unhealthy": 0}
+
+    async def warmup(self):
+        """预热：一次性创建全部槽位放入空闲队列"""
+        missing = self.size - self._idle.qsize() - self._in_use
+        if missing <= 0:
+            return
+        slots = await asyncio.gather(
+            *[self._create() for _ in range(missing)], return_exceptions=True
+        )
+        for slot in slots:
+            if isinstance(slot, Exception):
+                logger.warning(f"⚠️  页面池预热失败: {slot}")
+                continue
+            self._idle.put_nowait(slot)
+        logger.info(f"🔥 页面池预热完成: {self._idle.qsize()}/{self.size}")
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PooledPage]:
+        """
+        借出一个页面槽位
+
+        使用过程中抛出异常的槽位不会放回池中，而是直接关闭重建
+        """
+        if self._closed:
+            raise RuntimeError("页面池已关闭")
+
+        await self._slots.acquire()
+        self._in_use += 1
+        slot = None
+        healthy = False
+        try:
+            slot = await self._checkout()
+            yield slot
+            healthy = True
+        finally:
+            self._in_use -= 1
+            try:
+                if slot is not None:
+                    await self._checkin(slot, healthy)
+            finally:
+                self._slots.release()
+
+    async def _checkout(self) -> PooledPage:
+        """取出一个健康的空闲槽位，没有则新建"""
+        while not self._idle.empty():
+            slot = self._idle.get_nowait()
+            if await self._is_healthy(slot):
+                self._stats["reused"] += 1
+                return slot
+            self._stats["unhealthy"] += 1
+            await self._dispose(slot)
+        return await self._create()
+
+    async def _checkin(self, slot: PooledPage, healthy: bool):
+        """归还槽位：达到使用上限、出错或池已关闭时回收"""
+        slot.uses += 1
+        if self._closed or not healthy or slot.uses >= self.max_uses:
+            if slot.uses >= self.max_uses:
+                self._stats["recycled"] += 1
+                logger.debug(f"♻️  页面已使用 {slot.uses} 次，回收")
+            await self._dispose(slot)
+            return
+
+        try:
+            # 回到空白页，停止残留的媒体加载并释放页面内存
+            if slot.page.url != "about:blank":
+                await slot.page.goto("about:blank")
+        except Exception as e:
+            logger.debug(f"重置页面失败，回收: {e}")
+            await self._dispose(slot)
+            return
+        self._idle.put_nowait(slot)
+
+    async def _create(self) -> PooledPage:
+        slot = await self._factory()
+        self._live[id(slot)] = slot
+        self._stats["created"] += 1
+        return slot
+
+    async def _is_healthy(self, slot: PooledPage) -> bool:
+        try:
+            if slot.page.is_closed():
+                return False
+            await asyncio.wait_for(slot.page.evaluate("1"), self.HEALTH_CHECK_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    async def _dispose(self, slot: PooledPage):
+        self._live.pop(id(slot), None)
+        try:
+            await slot.context.close()
+        except Exception as e:
+            logger.debug(f"关闭页面上下文失败: {e}")
+
+    def contexts(self) -> List[Any]:
+        """全部存活槽位的 BrowserContext（不借出槽位，不计入使用次数）"""
+        return [slot.context for slot in self._live.values()]
+
+    def stats(self) -> Dict[str, int]:
+        """页面池运行指标"""
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "in_use": self._in_use,
+            **self._stats,
+        }
+
+    async def close(self):
+        """关闭池中所有空闲槽位，借出中的槽位在归还时关闭"""
+        self._closed = True
+        while not self._idle.empty():
+            await self._dispose(self._idle.get_nowait())
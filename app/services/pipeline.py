@@ -14,14 +14,17 @@ from typing import Callable, Dict, List, Optional
 from app.config import settings
 from app.models.schemas import (
     BatchTaskResponse,
+    MediaPolicy,
+    QualityHint,
     TaskResponse,
     TaskStatus,
     TranscriptResult,
+    TranscriptSegment,
 )
 from app.services.audio_extractor import audio_extractor
 from app.services.douyin_parser import douyin_parser
 from app.services.llm_enhancer import llm_enhancer
-from app.services.transcriber import transcriber_service
+from app.services.transcriber import AudioInput, SegmentCallback, transcriber_service
 from app.utils.helpers import clean_temp_files, generate_batch_id, generate_task_id
 
 logger = logging.getLogger(__name__)
@@ -29,6 +32,8 @@ logger = logging.getLogger(__name__)
 # 任务存储（生产环境可替换为 Redis）
 _task_store: Dict[str, TaskResponse] = {}
 _batch_store: Dict[str, BatchTaskResponse] = {}
+# 任务事件订阅者（SSE 连接），task_id -> 队列列表
+_subscribers: Dict[str, List[asyncio.Queue]] = {}
 
 
 def get_task(task_id: str) -> Optional[TaskResponse]:
@@ -39,6 +44,74 @@ def get_batch(batch_id: str) -> Optional[BatchTaskResponse]:
     return _batch_store.get(batch_id)
 
 
+def subscribe(task_id: str) -> asyncio.Queue:
+    """订阅任务事件，事件为 (类型, 数据)：progress / segment / done"""
+    queue: asyncio.Queue = asyncio.Queue()
+    _subscribers.setdefault(task_id, []).append(queue)
+    return queue
+
+
+def unsubscribe(task_id: str, queue: asyncio.Queue):
+    queues = _subscribers.get(task_id, [])
+    if queue in queues:
+        queues.remove(queue)
+    if not queues:
+        _subscribers.pop(task_id, None)
+
+
+def _publish(task_id: str, event: str, data: dict):
+    for queue in _subscribers.get(task_id, []):
+        queue.put_nowait((event, data))
+
+
+def audio_in_memory() -> bool:
+    """本地模型可直接接收 float32 数组；API 模式需要上传文件，只有裁剪时才先解码到内存"""
+    return settings.audio_in_memory and (settings.asr_mode != "api" or settings.speech_trim_enabled)
+
+
+async def transcribe_audio(
+    audio: AudioInput,
+    quality: Optional[QualityHint] = None,
+    on_segment: Optional[SegmentCallback] = None,
+) -> TranscriptResult:
+    """
+    裁剪非语音区间后转录，片段时间还原到裁剪前的时间轴（URL 任务和上传文件共用）
+
+    缓存摘要按裁剪前的音频计算并带上裁剪参数，同一段音频无论从哪个入口提交都能命中缓存
+    """
+    digest = None
+    if settings.transcript_cache_enabled:
+        from app.services.transcript_cache import audio_digest
+
+        loop = asyncio.get_event_loop()
+        digest = await loop.run_in_executor(None, audio_digest, audio)
+
+    offset_map = None
+    if settings.speech_trim_enabled and not isinstance(audio, Path):
+        audio, offset_map = audio_extractor.trim_silence(audio)
+        if digest:
+            digest += "|trim:" + json.dumps([
+                settings.speech_trim_threshold_db, settings.speech_trim_min_silence, settings.speech_trim_padding,
+            ])
+
+    def _on_segment(segment: TranscriptSegment):
+        # 流式推送的片段同样需要还原到裁剪前的时间轴
+        if offset_map:
+            segment = TranscriptSegment(
+                start=round(offset_map.to_source(segment.start), 3),
+                end=round(offset_map.to_source(segment.end, end=True), 3),
+                text=segment.text,
+            )
+        on_segment(segment)
+
+    transcript = await transcriber_service.transcribe(
+        audio, quality=quality, on_segment=_on_segment if on_segment else None, digest=digest,
+    )
+    if offset_map:
+        transcript = offset_map.remap(transcript)
+    return transcript
+
+
 def create_task(url: str) -> tuple[str, TaskResponse]:
     """创建新任务并返回任务ID和任务对象"""
     task_id = generate_task_id()
@@ -52,6 +125,8 @@ async def process_single(
     url: str,
     use_llm: bool = True,
     on_progress: Optional[Callable] = None,
+    media_policy: Optional[MediaPolicy] = None,
+    quality: Optional[QualityHint] = None,
 ) -> TaskResponse:
     """
     处理单个视频的完整流水线
@@ -61,6 +136,8 @@ async def process_single(
         url: 抖音视频链接
         use_llm: 是否使用大模型增强
         on_progress: 进度回调函数
+        media_policy: 媒体版本选择策略（留空使用服务端配置）
+        quality: 识别质量偏好（留空按时长和积压自动选择模型）
 
     Returns:
         TaskResponse 任务结果
@@ -71,42 +148,80 @@ async def process_single(
 
     video_path = None
     audio_path = None
+    audio = None
+    in_memory = audio_in_memory()
 
     try:
         # ─── 阶段1: 下载视频 ───
         task.status = TaskStatus.DOWNLOADING
         task.progress = 0.1
-        if on_progress:
-            await _safe_callback(on_progress, task)
-
-        video_path, video_info = await douyin_parser.download_video(url)
-        task.video_info = video_info
-        task.progress = 0.3
-
-        # ─── 阶段2: 提取音频 ───
-        task.status = TaskStatus.EXTRACTING_AUDIO
-        task.progress = 0.4
-        if on_progress:
-            await _safe_callback(on_progress, task)
-
-        audio_path = await audio_extractor.extract(video_path)
+        await _report(task, on_progress)
+
+        published = [0.0]
+
+        def _on_download(done: int, total: Optional[int]):
+            # 下载阶段占总进度 0.1 ~ 0.3
+            if total:
+                fraction = min(done / total, 1.0)
+                task.progress = round(0.1 + 0.2 * fraction, 3)
+                # 下载进度每变化 1% 推送一次，避免逐块推送
+                if fraction - published[0] >= 0.01 or (fraction == 1.0 and published[0] < 1.0):
+                    published[0] = fraction
+                    _publish_progress(task)
+
+        if settings.stream_extraction:
+            # ─── 阶段1+2: 下载数据直接送入 ffmpeg，边下载边提取音频 ───
+            try:
+                chunks, video_info = await douyin_parser.stream_video(
+                    url, on_progress=_on_download, media_policy=media_policy
+                )
+                task.video_info = video_info
+                if in_memory:
+                    audio = await audio_extractor.extract_stream_array(chunks)
+                else:
+                    audio = audio_path = await audio_extractor.extract_stream(
+                        chunks, settings.temp_dir / f"{video_info.video_id}-{task_id}.wav"
+                    )
+            except Exception as e:
+                # 例如 moov 在文件尾部的 mp4 无法从管道解析，退回到先下载后提取
+                logger.warning(f"流式提取失败，改为先下载再提取: {e}")
+                audio = audio_path = None
+
+        if audio is None:
+            video_path, video_info = await douyin_parser.download_video(
+                url, on_progress=_on_download, media_policy=media_policy
+            )
+            task.video_info = video_info
+            task.progress = 0.3
+
+            # ─── 阶段2: 提取音频 ───
+            task.status = TaskStatus.EXTRACTING_AUDIO
+            task.progress = 0.4
+            await _report(task, on_progress)
+
+            if in_memory:
+                audio = await audio_extractor.extract_array(video_path)
+            else:
+                audio = audio_path = await audio_extractor.extract(video_path)
         task.progress = 0.5
 
         # ─── 阶段3: 语音识别 ───
         task.status = TaskStatus.TRANSCRIBING
         task.progress = 0.6
-        if on_progress:
-            await _safe_callback(on_progress, task)
+        await _report(task, on_progress)
 
-        transcript = await transcriber_service.transcribe(audio_path)
+        def _on_segment(segment: TranscriptSegment):
+            task.partial_segments.append(segment)
+            _publish(task_id, "segment", segment.model_dump())
+
+        transcript = await transcribe_audio(audio, quality=quality, on_segment=_on_segment)
         task.progress = 0.8
 
         # ─── 阶段4: LLM 增强 ───
         if use_llm and settings.llm_enabled and (settings.ark_api_key or settings.llm_api_key):
             task.status = TaskStatus.ENHANCING
             task.progress = 0.85
-            if on_progress:
-                await _safe_callback(on_progress, task)
+            await _report(task, on_progress)
 
             enhanced_text = await llm_enhancer.enhance(transcript.raw_text)
             transcript.enhanced_text = enhanced_text
@@ -115,6 +230,7 @@ async def process_single(
 
         # ─── 完成 ───
         task.transcript = transcript
+        task.partial_segments = []
         task.status = TaskStatus.COMPLETED
         task.progress = 1.0
         task.completed_at = datetime.now()
@@ -136,8 +252,8 @@ async def process_single(
         if audio_path:
             clean_temp_files(audio_path)
 
-        if on_progress:
-            await _safe_callback(on_progress, task)
+        await _report(task, on_progress)
+        _publish(task_id, "done", task.model_dump(mode="json"))
 
     return task
 
@@ -146,6 +262,8 @@ async def process_batch(
     urls: List[str],
     use_llm: bool = True,
     on_progress: Optional[Callable] = None,
+    media_policy: Optional[MediaPolicy] = None,
+    quality: Optional[QualityHint] = None,
 ) -> BatchTaskResponse:
     """
     批量处理多个视频
@@ -154,6 +272,8 @@ async def process_batch(
         urls: 视频链接列表
         use_llm: 是否使用大模型增强
         on_progress: 进度回调
+        media_policy: 媒体版本选择策略
+        quality: 识别质量偏好
 
     Returns:
         BatchTaskResponse 批量任务结果
@@ -171,7 +291,9 @@ async def process_batch(
         async with semaphore:
             # 为批量任务中的每个子任务创建独立的task_id
             task_id, _ = create_task(url)
-            result = await process_single(task_id, url, use_llm=use_llm)
+            result = await process_single(
+                task_id, url, use_llm=use_llm, media_policy=media_policy, quality=quality
+            )
             batch.tasks.append(result)
             if result.status == TaskStatus.COMPLETED:
                 batch.completed += 1
@@ -234,6 +356,17 @@ async def _save_result(task: TaskResponse):
         logger.warning(f"保存结果失败: {e}")
 
 
+def _publish_progress(task: TaskResponse):
+    _publish(task.task_id, "progress", {"status": task.status.value, "progress": task.progress})
+
+
+async def _report(task: TaskResponse, on_progress: Optional[Callable]):
+    """推送阶段进度：通知事件订阅者并执行进度回调"""
+    _publish_progress(task)
+    if on_progress:
+        await _safe_callback(on_progress, task)
+
+
 async def _safe_callback(callback: Callable, *args):
     """安全执行回调"""
     try:
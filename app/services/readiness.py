@@ -0,0 +1,69 @@
+"""
+服务就绪状态
+记录启动预热中各组件（ASR 模型、浏览器池等）的加载状态和耗时，
+供 /api/ready 判断实例是否可以接收流量
+"""
+
+import logging
+import time
+from typing import Awaitable, Dict, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentState(BaseModel):
+    """单个组件的就绪状态"""
+    ready: bool = False
+    # 非必需组件加载失败不影响整体就绪（例如浏览器，首个任务时还会重试）
+    required: bool = True
+    loading: bool = False
+    load_time: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReadinessTracker:
+    """组件就绪状态登记表"""
+
+    def __init__(self):
+        self.components: Dict[str, ComponentState] = {}
+
+    def register(self, name: str, required: bool = True):
+        """登记需要等待的组件（预热开始前调用，确保 /api/ready 在加载完成前返回未就绪）"""
+        self.components.setdefault(name, ComponentState(required=required, loading=True))
+
+    async def track(self, name: str, awaitable: Awaitable) -> bool:
+        """等待组件加载并记录耗时，失败时记录错误并返回 False"""
+        state = self.components.setdefault(name, ComponentState())
+        state.loading = True
+        started_at = time.monotonic()
+        try:
+            await awaitable
+            state.ready = True
+            state.error = None
+            logger.info(f"✅ {name} 已就绪 ({time.monotonic() - started_at:.1f}s)")
+        except Exception as e:
+            state.error = str(e)
+            logger.warning(f"{name} 预热失败: {e}")
+        finally:
+            state.loading = False
+            state.load_time = round(time.monotonic() - started_at, 3)
+        return state.ready
+
+    @property
+    def ready(self) -> bool:
+        return all(
+            state.ready or (not state.required and not state.loading)
+            for state in self.components.values()
+        )
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "components": {name: state.model_dump() for name, state in self.components.items()},
+        }
+
+
+# 全局单例
+readiness = ReadinessTracker()
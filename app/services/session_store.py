@@ -0,0 +1,132 @@
+"""
+浏览器会话持久化
+启动时从磁盘加载 storage_state（Cookie + localStorage），运行中定期快照回磁盘，
+所有新建的 BrowserContext 共享最新的会话状态，重启后不必从零“养” Cookie
+"""
+
+import asyncio
+import json
+import logging
+from http.cookiejar import MozillaCookieJar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def load_netscape_cookies(path: Path) -> List[dict]:
+    """读取 Netscape 格式的 cookies.txt（yt-dlp / 浏览器插件导出）并转换为 Playwright Cookie"""
+    jar = MozillaCookieJar(str(path))
+    jar.load(ignore_discard=True, ignore_expires=True)
+    return [
+        {
+            "name": c.name,
+            "value": c.value or "",
+            "domain": c.domain,
+            "path": c.path or "/",
+            "expires": float(c.expires) if c.expires else -1,
+            "httpOnly": False,
+            "secure": bool(c.secure),
+            "sameSite": "Lax",
+        }
+        for c in jar
+    ]
+
+
+def _expires(cookie: dict) -> float:
+    """会话 Cookie（expires 为 -1）视为最晚过期"""
+    expires = cookie.get("expires", -1)
+    return float("inf") if expires is None or expires < 0 else expires
+
+
+class SessionStore:
+    """storage_state 的内存副本与磁盘持久化"""
+
+    def __init__(self, state_file: Optional[Path], cookies_file: Optional[Path] = None):
+        self.state_file = state_file
+        self.cookies_file = cookies_file
+        self.state: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> Optional[dict]:
+        """加载会话状态，并合并 cookies 文件中尚未存在的 Cookie"""
+        state = {"cookies": [], "origins": []}
+        if self.state_file and self.state_file.exists():
+            try:
+                state = json.loads(self.state_file.read_text(encoding="utf-8"))
+                logger.info(f"🍪 已加载浏览器会话: {len(state.get('cookies', []))} 个 Cookie")
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取浏览器会话失败: {e}")
+
+        if self.cookies_file and self.cookies_file.exists():
+            try:
+                existing = {(c["name"], c["domain"], c.get("path", "/")) for c in state["cookies"]}
+                extra = [
+                    c for c in load_netscape_cookies(self.cookies_file)
+                    if (c["name"], c["domain"], c["path"]) not in existing
+                ]
+                state["cookies"].extend(extra)
+                logger.info(f"🍪 已从 {self.cookies_file.name} 导入 {len(extra)} 个 Cookie")
+            except Exception as e:
+                logger.warning(f"读取 cookies 文件失败: {e}")
+
+        self.state = state if state["cookies"] or state["origins"] else None
+        return self.state
+
+    def cookies(self) -> List[dict]:
+        """共享会话中的 Cookie（没有会话时为空）"""
+        return list((self.state or {}).get("cookies", []))
+
+    async def snapshot(self, contexts: List[Any]):
+        """
+        汇总所有浏览器上下文的会话并写入磁盘
+
+        同名 Cookie（name + domain + path）保留过期时间最晚的一份，localStorage 按 origin 合并
+        """
+        results = await asyncio.gather(*[c.storage_state() for c in contexts], return_exceptions=True)
+        states = [s for s in results if isinstance(s, dict)]
+        if not states:
+            return  # 上下文都已关闭（回收中），保留现有会话
+
+        cookies, origins = {}, {}
+        for s in states:
+            for cookie in s.get("cookies", []):
+                key = (cookie["name"], cookie["domain"], cookie.get("path", "/"))
+                previous = cookies.get(key)
+                if previous is None or _expires(cookie) >= _expires(previous):
+                    cookies[key] = cookie
+            for origin in s.get("origins", []):
+                origins[origin["origin"]] = origin
+        state = {"cookies": list(cookies.values()), "origins": list(origins.values())}
+        self.state = state
+        if not self.state_file:
+            return
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_file.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self.state_file)
+        logger.debug(f"浏览器会话已保存: {len(state.get('cookies', []))} 个 Cookie")
+
+    def start_periodic(self, interval: float, take_snapshot: Callable[[], Awaitable[None]]):
+        """按固定间隔执行快照"""
+        if interval <= 0 or self._task:
+            return
+
+        async def _loop():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await take_snapshot()
+                except Exception as e:
+                    logger.warning(f"保存浏览器会话失败: {e}")
+
+        self._task = asyncio.ensure_future(_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
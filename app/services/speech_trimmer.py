@@ -0,0 +1,221 @@
+"""
+语音区间裁剪
+在送入 ASR 之前用能量检测去掉片头片尾和中间的长静音/低电平背景段，
+只保留语音区间拼接后的音频，并记录偏移映射用于还原时间轴
+同样的检测也用于在停顿处切分长音频，供多个 ASR 进程并行转录
+"""
+
+import bisect
+import logging
+from typing import TYPE_CHECKING, List, NamedTuple, Tuple
+
+from app.models.schemas import TranscriptResult, TranscriptSegment
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 分析帧长（毫秒）
+FRAME_MS = 30
+# 绝对静音门限（dBFS），低于此电平的帧一律视为静音
+SILENCE_FLOOR_DB = -60.0
+
+
+class OffsetMap:
+    """
+    裁剪后时间 -> 原始时间的映射
+
+    spans 为按顺序拼接的 (原始开始, 原始结束) 区间（秒）
+    """
+
+    def __init__(self, spans: List[Tuple[float, float]]):
+        self.spans = spans
+        self._starts: List[float] = []
+        position = 0.0
+        for start, end in spans:
+            self._starts.append(position)
+            position += end - start
+        self.duration = position
+
+    @classmethod
+    def identity(cls, duration: float) -> "OffsetMap":
+        return cls([(0.0, duration)])
+
+    @property
+    def is_identity(self) -> bool:
+        return len(self.spans) == 1 and self.spans[0][0] == 0.0
+
+    def to_source(self, t: float, end: bool = False) -> float:
+        """
+        把裁剪后音频上的时间换算回原始时间
+
+        Args:
+            t: 裁剪后的时间（秒）
+            end: 是否为片段结束时间（恰好落在拼接点时归到前一个区间）
+        """
+        if not self.spans:
+            return t
+        if end:
+            index = bisect.bisect_left(self._starts, t) - 1
+        else:
+            index = bisect.bisect_right(self._starts, t) - 1
+        index = min(max(index, 0), len(self.spans) - 1)
+        start, stop = self.spans[index]
+        return min(start + max(t - self._starts[index], 0.0), stop)
+
+    def remap(self, result: TranscriptResult) -> TranscriptResult:
+        """还原转录结果中各片段的时间戳"""
+        if self.is_identity:
+            return result
+        result.segments = [
+            TranscriptSegment(
+                start=round(self.to_source(seg.start), 3),
+                end=round(self.to_source(seg.end, end=True), 3),
+                text=seg.text,
+            )
+            for seg in result.segments
+        ]
+        return result
+
+
+def detect_speech(
+    audio: "np.ndarray",
+    sample_rate: int,
+    threshold_db: float = -35.0,
+    min_silence: float = 1.0,
+    padding: float = 0.25,
+) -> List[Tuple[float, float]]:
+    """
+    基于短时能量检测语音区间
+
+    Args:
+        audio: float32 单声道音频
+        sample_rate: 采样率
+        threshold_db: 相对于整段响度（95 分位帧能量）的门限，低于该值视为非语音
+        min_silence: 短于该时长（秒）的静音不切分
+        padding: 每个语音区间前后保留的余量（秒）
+
+    Returns:
+        (开始, 结束) 区间列表（秒）
+    """
+    import numpy as np
+
+    frame = int(sample_rate * FRAME_MS / 1000)
+    count = len(audio) // frame
+    duration = len(audio) / sample_rate
+    if count == 0:
+        return [(0.0, duration)]
+
+    frames = audio[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-12)
+    db = 20 * np.log10(rms)
+    reference = float(np.percentile(db, 95))
+    active = db > max(reference + threshold_db, SILENCE_FLOOR_DB)
+    if not active.any():
+        return []
+
+    # 连续的有声帧 -> 区间
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    frame_sec = frame / sample_rate
+
+    spans: List[Tuple[float, float]] = []
+    for s, e in zip(starts, ends):
+        start = max(float(s) * frame_sec - padding, 0.0)
+        end = min(float(e) * frame_sec + padding, duration)
+        if spans and start - spans[-1][1] < min_silence:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def trim_audio(
+    audio: "np.ndarray",
+    sample_rate: int,
+    threshold_db: float = -35.0,
+    min_silence: float = 1.0,
+    padding: float = 0.25,
+    min_saving: float = 0.05,
+) -> Tuple["np.ndarray", OffsetMap]:
+    """
+    只保留语音区间
+
+    节省比例低于 min_saving 或没有检测到语音时原样返回，交给 ASR 自行判断
+    """
+    import numpy as np
+
+    duration = len(audio) / sample_rate
+    spans = detect_speech(audio, sample_rate, threshold_db, min_silence, padding)
+    kept = sum(end - start for start, end in spans)
+    if not spans or kept >= duration * (1 - min_saving):
+        return audio, OffsetMap.identity(duration)
+
+    trimmed = np.concatenate([
+        audio[int(start * sample_rate):int(end * sample_rate)] for start, end in spans
+    ])
+    logger.info(
+        f"✂️  裁剪非语音区间: {duration:.1f}s -> {kept:.1f}s "
+        f"({len(spans)} 段，节省 {(1 - kept / duration) * 100:.0f}%)"
+    )
+    return trimmed, OffsetMap(spans)
+
+
+class AudioChunk(NamedTuple):
+    """
+    切分出的音频块（秒）
+
+    [start, end) 为送入 ASR 的范围（硬切时与相邻块重叠），
+    [keep_start, keep_end) 为该块负责输出片段的范围，用于合并时去重
+    """
+    start: float
+    end: float
+    keep_start: float
+    keep_end: float
+
+
+def split_on_silence(
+    audio: "np.ndarray",
+    sample_rate: int,
+    chunk_seconds: float,
+    overlap: float = 1.0,
+    search: float = 0.25,
+) -> List[AudioChunk]:
+    """
+    在停顿处把长音频切成约 chunk_seconds 的块
+
+    每个切点在目标位置前后 chunk_seconds * search 范围内找最近的停顿；
+    找不到停顿时在目标位置硬切，并让相邻两块各自多包含 overlap 秒
+    """
+    duration = len(audio) / sample_rate
+    if duration <= chunk_seconds * 1.25:
+        return [AudioChunk(0.0, duration, 0.0, duration)]
+
+    spans = detect_speech(audio, sample_rate, min_silence=0.2, padding=0.05)
+    pauses = [(spans[i][1] + spans[i + 1][0]) / 2 for i in range(len(spans) - 1)]
+
+    cuts: List[Tuple[float, bool]] = []
+    position = 0.0
+    while duration - position > chunk_seconds * 1.25:
+        target = position + chunk_seconds
+        nearby = [p for p in pauses if abs(p - target) <= chunk_seconds * search]
+        if nearby:
+            cuts.append((min(nearby, key=lambda p: abs(p - target)), True))
+        else:
+            cuts.append((target, False))
+        position = cuts[-1][0]
+    cuts.append((duration, True))
+
+    chunks: List[AudioChunk] = []
+    previous, previous_clean = 0.0, True
+    for cut, clean in cuts:
+        chunks.append(AudioChunk(
+            start=previous if previous_clean else max(previous - overlap, 0.0),
+            end=cut if clean else min(cut + overlap, duration),
+            keep_start=previous,
+            keep_end=cut,
+        ))
+        previous, previous_clean = cut, clean
+    return chunks
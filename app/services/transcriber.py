@@ -1,104 +1,312 @@
 """
 语音转文字服务
 支持本地 faster-whisper 和 OpenAI Whisper API 两种模式
+输入既可以是音频文件路径，也可以是 16kHz 单声道 float32 数组
 """
 
 import asyncio
+import difflib
+import json
 import logging
+import os
+import re
+import tempfile
+import uuid
+import wave
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
 
 from app.config import settings
-from app.models.schemas import TranscriptResult, TranscriptSegment
+from app.models.schemas import QualityHint, TranscriptResult, TranscriptSegment
+from app.services.asr_batcher import batching_supported
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from app.services.audio_fingerprint import FingerprintMatch
+    from app.services.speech_trimmer import AudioChunk
 
 logger = logging.getLogger(__name__)
 
+# 音频文件路径，或 16kHz 单声道 float32 数组
+AudioInput = Union[Path, "np.ndarray"]
+# 每识别出一个片段调用一次（在事件循环线程中执行）
+SegmentCallback = Callable[[TranscriptSegment], None]
 
-class LocalTranscriber:
+SAMPLE_RATE = 16000
+
+
+def describe_audio(audio: AudioInput) -> str:
+    """日志中使用的音频描述"""
+    if isinstance(audio, Path):
+        return audio.name
+    return f"<内存音频 {len(audio) / SAMPLE_RATE:.1f}s>"
+
+
+def audio_duration(audio: AudioInput) -> float:
+    """音频时长（秒），无法读取时返回 0"""
+    if not isinstance(audio, Path):
+        return len(audio) / SAMPLE_RATE
+    try:
+        with wave.open(str(audio), 'rb') as f:
+            return f.getnframes() / f.getframerate()
+    except (OSError, wave.Error, EOFError):
+        return 0.0
+
+
+def model_tiers() -> List[str]:
+    """可选模型，从小到大（未配置分级时只有 whisper_model_size）"""
+    tiers = [t.strip() for t in settings.whisper_model_tiers.split(',') if t.strip()]
+    return tiers or [settings.whisper_model_size]
+
+
+def select_model(duration: float, backlog: int, quality: Optional[QualityHint] = None) -> str:
     """
-    本地 Whisper 转录器
-    使用 faster-whisper (CTranslate2 后端) 实现高效的本地语音识别
+    按时长、积压和质量偏好选择模型
+
+    - accurate: 始终使用最大的模型
+    - fast:     始终使用最小的模型
+    - 其他:     从最大的模型开始，超长音频降一级，积压每达到 asr_backlog_step 再降一级
     """
+    tiers = model_tiers()
+    if quality == QualityHint.ACCURATE:
+        return tiers[-1]
+    if quality == QualityHint.FAST:
+        return tiers[0]
+
+    index = len(tiers) - 1
+    if settings.asr_long_clip_duration and duration > settings.asr_long_clip_duration:
+        index -= 1
+    if settings.asr_backlog_step:
+        index -= backlog // settings.asr_backlog_step
+    return tiers[max(index, 0)]
+
+
+def write_wav(audio: "np.ndarray", output_path: Path) -> Path:
+    """把 float32 数组写成 16 位 PCM WAV 文件"""
+    import numpy as np
+
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(str(output_path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+    return output_path
+
+
+def load_whisper_model(model_size: Optional[str] = None, cpu_threads: int = 0):
+    """按配置加载 faster-whisper 模型（设备与精度自动适配）"""
+    from faster_whisper import WhisperModel
+
+    device = settings.whisper_device
+    if device == "auto":
+        import torch
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    compute_type = settings.whisper_compute_type
+    if device == "cpu" and compute_type == "float16":
+        compute_type = "int8"  # CPU 不支持 float16
+
+    model_size = model_size or settings.whisper_model_size
+    logger.info(
+        f"加载 Whisper 模型: {model_size} "
+        f"(设备: {device}, 精度: {compute_type})"
+    )
+    model = WhisperModel(
+        model_size,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+    )
+    logger.info("Whisper 模型加载完成")
+    return model
+
+
+def warmup_model(model):
+    """用 1 秒静音跑一次完整推理（关闭 VAD，确保真正经过模型），预热内存分配和计算图"""
+    import numpy as np
+
+    segments, _ = model.transcribe(
+        np.zeros(SAMPLE_RATE, dtype=np.float32),
+        language=settings.whisper_language or None,
+        beam_size=1,
+        vad_filter=False,
+    )
+    list(segments)
+
+
+# 本地转录的解码参数（同时参与转录缓存键的计算）
+DECODE_OPTIONS = dict(
+    beam_size=5,
+    best_of=5,
+    vad_filter=True,           # 启用 VAD 过滤静音
+    vad_parameters=dict(
+        min_silence_duration_ms=500,
+        speech_pad_ms=200,
+    ),
+    word_timestamps=False,
+)
+
+
+def run_transcription(
+    model,
+    audio: AudioInput,
+    on_segment: Optional[Callable[[TranscriptSegment], None]] = None,
+) -> TranscriptResult:
+    """用给定模型同步转录（在线程池或 ASR 工作进程中执行），on_segment 在当前线程中调用"""
+    segments_iter, info = model.transcribe(
+        str(audio) if isinstance(audio, Path) else audio,
+        language=settings.whisper_language or None,
+        **DECODE_OPTIONS,
+    )
+
+    segments: List[TranscriptSegment] = []
+    full_text_parts = []
+
+    for seg in segments_iter:
+        segment = TranscriptSegment(
+            start=round(seg.start, 3),
+            end=round(seg.end, 3),
+            text=seg.text.strip(),
+        )
+        segments.append(segment)
+        full_text_parts.append(seg.text.strip())
+        if on_segment:
+            on_segment(segment)
 
-    def __init__(self):
-        self._model = None
+    raw_text = ''.join(full_text_parts)
 
-    def _get_model(self):
-        """懒加载模型（首次调用时加载）"""
-        if self._model is None:
-            from faster_whisper import WhisperModel
+    return TranscriptResult(
+        raw_text=raw_text,
+        segments=segments,
+        language=info.language,
+        confidence=round(info.language_probability, 4),
+    )
 
-            device = settings.whisper_device
-            if device == "auto":
-                import torch
-                device = "cuda" if torch.cuda.is_available() else "cpu"
 
-            compute_type = settings.whisper_compute_type
-            if device == "cpu" and compute_type == "float16":
-                compute_type = "int8"  # CPU 不支持 float16
+def merge_chunk_results(results: List[TranscriptResult], chunks: List["AudioChunk"]) -> TranscriptResult:
+    """
+    合并分块转录结果
 
-            logger.info(
-                f"加载 Whisper 模型: {settings.whisper_model_size} "
-                f"(设备: {device}, 精度: {compute_type})"
-            )
-            self._model = WhisperModel(
-                settings.whisper_model_size,
-                device=device,
-                compute_type=compute_type,
-            )
-            logger.info("Whisper 模型加载完成")
-        return self._model
+    片段时间加上块的起点偏移；只保留中点落在块自身负责范围内的片段，
+    重叠区域中与上一片段文字相同的重复片段也会去掉
+    """
+    segments: List[TranscriptSegment] = []
+    for index, (result, chunk) in enumerate(zip(results, chunks)):
+        last = index == len(chunks) - 1
+        for seg in result.segments:
+            start = seg.start + chunk.start
+            end = seg.end + chunk.start
+            middle = (start + end) / 2
+            if middle < chunk.keep_start or (middle >= chunk.keep_end and not last):
+                continue
+            if segments and seg.text == segments[-1].text and start < segments[-1].end:
+                continue
+            segments.append(TranscriptSegment(start=round(start, 3), end=round(end, 3), text=seg.text))
+
+    confidences = [r.confidence for r in results if r.confidence]
+    return TranscriptResult(
+        raw_text=''.join(seg.text for seg in segments),
+        segments=segments,
+        language=next((r.language for r in results if r.language), ""),
+        confidence=round(sum(confidences) / len(confidences), 4) if confidences else 0.0,
+    )
+
+
+def text_overlap(probe: str, reference: str) -> float:
+    """探测文字中能在参考文字里按顺序找到的字符占比（忽略标点和空白）"""
+    probe, reference = re.sub(r'[\W_]+', '', probe.lower()), re.sub(r'[\W_]+', '', reference.lower())
+    if not probe or not reference:
+        return float(probe == reference)
+    matcher = difflib.SequenceMatcher(None, probe, reference, autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / len(probe)
+
+
+def _emit_all(result: TranscriptResult, on_segment: Optional[SegmentCallback]):
+    """不支持逐段推送的后端在完成后一次性推送全部片段"""
+    if on_segment:
+        for segment in result.segments:
+            on_segment(segment)
+
+
+class LocalTranscriber:
+    """
+    本地 Whisper 转录器
+    使用 faster-whisper (CTranslate2 后端) 实现高效的本地语音识别
+    """
 
-    async def transcribe(self, audio_path: Path) -> TranscriptResult:
+    def __init__(self):
+        self._models: Dict[str, object] = {}
+        self._batchers: Dict[str, object] = {}
+
+    def _get_model(self, model_size: Optional[str] = None):
+        """懒加载模型（首次调用时加载），每个尺寸各保留一份"""
+        model_size = model_size or settings.whisper_model_size
+        if model_size not in self._models:
+            self._models[model_size] = load_whisper_model(model_size)
+        return self._models[model_size]
+
+    async def warmup(self):
+        """启动时加载所有分级模型并预热"""
+        if settings.asr_workers > 0:
+            from app.services.asr_pool import asr_pool
+
+            await asr_pool.start()
+            return
+        loop = asyncio.get_event_loop()
+        for model_size in model_tiers():
+            await loop.run_in_executor(None, lambda: warmup_model(self._get_model(model_size)))
+
+    def _get_batcher(self, model_size: str):
+        if model_size not in self._batchers:
+            from app.services.asr_batcher import BatchingTranscriber
+
+            self._batchers[model_size] = BatchingTranscriber(
+                lambda: self._get_model(model_size),
+                max_files=settings.asr_batch_max_files,
+                max_wait=settings.asr_batch_max_wait,
+                batch_size=settings.asr_batch_size,
+            )
+        return self._batchers[model_size]
+
+    async def transcribe(
+        self,
+        audio: AudioInput,
+        model_size: Optional[str] = None,
+        on_segment: Optional[SegmentCallback] = None,
+    ) -> TranscriptResult:
         """
-        转录音频文件
+        转录音频
 
         Args:
-            audio_path: 音频文件路径
+            audio: 音频文件路径或 float32 数组（数组直接送入模型，无需解码文件）
+            model_size: 使用的模型（留空使用 whisper_model_size）
+            on_segment: 片段回调（线程池模式下逐个推送，进程池/批量模式下在完成后一次推送）
 
         Returns:
             TranscriptResult 转录结果
         """
-        def _transcribe():
-            model = self._get_model()
-
-            segments_iter, info = model.transcribe(
-                str(audio_path),
-                language=settings.whisper_language or None,
-                beam_size=5,
-                best_of=5,
-                vad_filter=True,           # 启用 VAD 过滤静音
-                vad_parameters=dict(
-                    min_silence_duration_ms=500,
-                    speech_pad_ms=200,
-                ),
-                word_timestamps=False,
-            )
-
-            segments: List[TranscriptSegment] = []
-            full_text_parts = []
-
-            for seg in segments_iter:
-                segment = TranscriptSegment(
-                    start=round(seg.start, 3),
-                    end=round(seg.end, 3),
-                    text=seg.text.strip(),
-                )
-                segments.append(segment)
-                full_text_parts.append(seg.text.strip())
-
-            raw_text = ''.join(full_text_parts)
-
-            return TranscriptResult(
-                raw_text=raw_text,
-                segments=segments,
-                language=info.language,
-                confidence=round(info.language_probability, 4),
+        model_size = model_size or settings.whisper_model_size
+        logger.info(f"开始本地语音识别: {describe_audio(audio)} (模型: {model_size})")
+        if settings.asr_workers > 0:
+            # 多进程 ASR：每个工作进程各自持有一份模型
+            from app.services.asr_pool import asr_pool
+
+            result = await asr_pool.transcribe(audio, model_size)
+            _emit_all(result, on_segment)
+        elif settings.asr_batch_enabled and not isinstance(audio, Path) and batching_supported():
+            # 与其他排队中的音频合并成一次批量推理
+            result = await self._get_batcher(model_size).transcribe(audio)
+            _emit_all(result, on_segment)
+        else:
+            loop = asyncio.get_event_loop()
+            # 识别线程中产生的片段转交给事件循环线程
+            emit = (lambda seg: loop.call_soon_threadsafe(on_segment, seg)) if on_segment else None
+            # 模型在线程池中加载，首次加载不阻塞事件循环
+            result = await loop.run_in_executor(
+                None, lambda: run_transcription(self._get_model(model_size), audio, emit)
             )
-
-        logger.info(f"开始本地语音识别: {audio_path.name}")
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, _transcribe)
         logger.info(f"语音识别完成，共 {len(result.segments)} 个片段，{len(result.raw_text)} 字")
         return result
 
@@ -107,40 +315,129 @@ class APITranscriber:
     """
     OpenAI Whisper API 转录器
     适用于没有本地 GPU 或需要快速处理的场景
+
+    所有请求共用一个带连接池的客户端（keep-alive，避免每个文件重新握手）；
+    上传前转码为 Opus/MP3，超过大小上限的音频在停顿处切块分别上传
     """
 
-    async def transcribe(self, audio_path: Path) -> TranscriptResult:
+    def __init__(self):
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_api_base,
+                timeout=httpx.Timeout(settings.openai_timeout, connect=settings.request_timeout),
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.openai_max_connections,
+                        max_keepalive_connections=settings.openai_max_connections,
+                        keepalive_expiry=120,
+                    ),
+                ),
+            )
+        return self._client
+
+    @staticmethod
+    def _max_upload_seconds() -> float:
+        """按上传格式的码率估算单个文件能容纳的时长（秒）"""
+        if settings.openai_upload_format == "wav":
+            bytes_per_second = SAMPLE_RATE * 2
+        else:
+            # 留出 10% 给容器开销和码率波动
+            bytes_per_second = settings.openai_upload_bitrate * 1000 / 8 * 1.1
+        return settings.openai_max_upload_mb * 1024 * 1024 / bytes_per_second
+
+    async def transcribe(
+        self,
+        audio: AudioInput,
+        model_size: Optional[str] = None,
+        on_segment: Optional[SegmentCallback] = None,
+    ) -> TranscriptResult:
         """
         使用 OpenAI Whisper API 转录
 
         Args:
-            audio_path: 音频文件路径
+            audio: 音频文件路径或 float32 数组
+            model_size: 忽略，API 模式固定使用 openai_whisper_model
+            on_segment: 片段回调（响应返回后一次推送）
 
         Returns:
             TranscriptResult 转录结果
         """
-        from openai import AsyncOpenAI
+        logger.info(f"开始 API 语音识别: {describe_audio(audio)}")
 
-        client = AsyncOpenAI(
-            api_key=settings.openai_api_key,
-            base_url=settings.openai_api_base,
-        )
+        max_seconds = self._max_upload_seconds()
+        if audio_duration(audio) > max_seconds:
+            result = await self._transcribe_split(audio, max_seconds)
+        else:
+            result = await self._transcribe_file(audio)
 
-        logger.info(f"开始 API 语音识别: {audio_path.name}")
+        _emit_all(result, on_segment)
+        logger.info(f"API 语音识别完成，{len(result.raw_text)} 字")
+        return result
 
-        with open(audio_path, 'rb') as f:
-            # 获取详细的时间轴结果
-            response = await client.audio.transcriptions.create(
-                model=settings.openai_whisper_model,
-                file=f,
-                language=settings.whisper_language or None,
-                response_format="verbose_json",
-                timestamp_granularities=["segment"],
-            )
+    async def _transcribe_split(self, audio: AudioInput, max_seconds: float) -> TranscriptResult:
+        """超过上传大小上限：在停顿处切块，并发上传后按偏移合并"""
+        from app.services.audio_extractor import audio_extractor
+        from app.services.speech_trimmer import split_on_silence
+
+        if isinstance(audio, Path):
+            audio = await audio_extractor.extract_array(audio)
+        # 切点可能偏离目标 25%，两端还可能各带 overlap 秒的重叠
+        overlap = settings.asr_split_overlap
+        chunks = split_on_silence(audio, SAMPLE_RATE, (max_seconds - 2 * overlap) / 1.25, overlap=overlap)
+        logger.info(f"音频超过上传上限，切分为 {len(chunks)} 块上传")
+        results = await asyncio.gather(*[
+            self._transcribe_file(audio[int(c.start * SAMPLE_RATE):int(c.end * SAMPLE_RATE)])
+            for c in chunks
+        ])
+        return merge_chunk_results(list(results), chunks)
+
+    async def _transcribe_file(self, audio: AudioInput) -> TranscriptResult:
+        """转码（按配置）并上传单个文件"""
+        upload_format = settings.openai_upload_format
+        temp_path = None
+        if upload_format == "wav" and isinstance(audio, Path):
+            upload_path = audio
+        else:
+            fd, name = tempfile.mkstemp(suffix=f'.{upload_format}', dir=settings.temp_dir)
+            os.close(fd)
+            upload_path = temp_path = Path(name)
+
+        try:
+            if upload_format == "wav":
+                if temp_path:
+                    write_wav(audio, temp_path)
+            else:
+                from app.services.audio_extractor import audio_extractor
+
+                await audio_extractor.encode(audio, upload_path, settings.openai_upload_bitrate)
+            logger.debug(f"上传音频: {upload_path.stat().st_size / 1024:.1f} KB ({upload_format})")
+
+            with open(upload_path, 'rb') as f:
+                # 获取详细的时间轴结果
+                response = await self._get_client().audio.transcriptions.create(
+                    model=settings.openai_whisper_model,
+                    file=f,
+                    language=settings.whisper_language or None,
+                    response_format="verbose_json",
+                    timestamp_granularities=["segment"],
+                )
+        finally:
+            if temp_path:
+                temp_path.unlink(missing_ok=True)
 
         segments = []
         if hasattr(response, 'segments') and response.segments:
             for seg in response.segments:
+                # 新版 SDK 返回 TranscriptionSegment 对象，旧版为 dict
+                if not isinstance(seg, dict):
+                    seg = seg.model_dump()
                 segments.append(TranscriptSegment(
                     start=round(seg['start'], 3),
                     end=round(seg['end'], 3),
@@ -149,15 +446,17 @@ class APITranscriber:
 
         raw_text = response.text if hasattr(response, 'text') else ''
 
-        result = TranscriptResult(
+        return TranscriptResult(
             raw_text=raw_text,
             segments=segments,
             language=getattr(response, 'language', settings.whisper_language),
             confidence=0.0,
         )
 
-        logger.info(f"API 语音识别完成，{len(result.raw_text)} 字")
-        return result
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
 
 
 class TranscriberService:
@@ -169,6 +468,8 @@ class TranscriberService:
     def __init__(self):
         self._local: Optional[LocalTranscriber] = None
         self._api: Optional[APITranscriber] = None
+        # 正在转录的任务数，用于按积压程度选择模型
+        self._active = 0
 
     def _get_transcriber(self):
         if settings.asr_mode == "api":
@@ -180,10 +481,222 @@ class TranscriberService:
                 self._local = LocalTranscriber()
             return self._local
 
-    async def transcribe(self, audio_path: Path) -> TranscriptResult:
-        """执行语音转文字"""
+    async def transcribe(
+        self,
+        audio: AudioInput,
+        quality: Optional[QualityHint] = None,
+        on_segment: Optional[SegmentCallback] = None,
+        digest: Optional[str] = None,
+    ) -> TranscriptResult:
+        """
+        执行语音转文字（文件路径或 float32 数组）
+
+        Args:
+            audio: 音频
+            quality: 质量偏好，本地模式下与时长、积压一起决定使用的模型
+            on_segment: 片段回调，识别出片段后尽快推送（用于流式返回）
+            digest: 缓存用的音频摘要，音频经过裁剪等处理时由调用方按原始音频给出，留空时按 audio 计算
+        """
+        transcriber = self._get_transcriber()
+        if settings.asr_mode == "api":
+            model_size = settings.openai_whisper_model
+        else:
+            # 积压 = 正在转录的任务数超出可并行处理能力的部分
+            backlog = max(0, self._active - max(settings.asr_workers, 1))
+            model_size = select_model(audio_duration(audio), backlog, quality)
+
+        key = None
+        if settings.transcript_cache_enabled:
+            from app.services.transcript_cache import transcript_cache
+
+            key = await self._cache_key(audio, model_size, digest)
+            cached = transcript_cache.get(key)
+            if cached is not None:
+                logger.info(f"♻️  命中转录缓存: {describe_audio(audio)}")
+                _emit_all(cached, on_segment)
+                return cached
+
+        match = None
+        if settings.fingerprint_enabled and not isinstance(audio, Path):
+            from app.services.audio_fingerprint import fingerprint_index
+
+            profile = self._asr_profile(model_size)
+            loop = asyncio.get_event_loop()
+            match = await loop.run_in_executor(
+                None, fingerprint_index.match, audio, settings.fingerprint_match_threshold, profile,
+            )
+
+        self._active += 1
+        try:
+            if match is not None and not await self._verify_match(transcriber, audio, model_size, match):
+                match = None
+            if match is not None:
+                result = await self._transcribe_uncovered(transcriber, audio, model_size, match)
+                _emit_all(result, on_segment)
+            elif self._should_split(audio):
+                # 分块结果需要合并去重后才能确定，合并完成后一次推送
+                result = await self._transcribe_split(transcriber, audio, model_size)
+                _emit_all(result, on_segment)
+            else:
+                result = await transcriber.transcribe(audio, model_size, on_segment)
+        finally:
+            self._active -= 1
+        result.model = result.model or model_size
+
+        if key:
+            transcript_cache.put(key, result)
+        if settings.fingerprint_enabled and not isinstance(audio, Path) and match is None:
+            await loop.run_in_executor(
+                None, fingerprint_index.add, key or uuid.uuid4().hex, audio, result, profile,
+            )
+        return result
+
+    async def _verify_match(
+        self, transcriber, audio: "np.ndarray", model_size: str, match: "FingerprintMatch",
+    ) -> bool:
+        """
+        转录匹配范围中间的一小段，与参考转录同一时段的文字比对
+
+        共用背景音乐的不同视频指纹得分也可能不低，只看指纹会把别的视频的转录结果当成自己的
+        """
+        seconds = settings.fingerprint_verify_seconds
+        if seconds <= 0:
+            return True
+        start = max(match.query_start, (match.query_start + match.query_end - seconds) / 2)
+        end = min(match.query_end, start + seconds)
+        probe = await transcriber.transcribe(audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)], model_size)
+        expected = "".join(
+            seg.text for seg in match.shifted().segments if seg.end > start and seg.start < end
+        )
+        overlap = text_overlap("".join(seg.text for seg in probe.segments), expected)
+        if overlap < settings.fingerprint_verify_similarity:
+            logger.info(
+                f"🔍 音频指纹 {match.clip_id} (得分 {match.score:.2f}) 未通过文字校验 "
+                f"({overlap:.2f})，完整转录"
+            )
+            return False
+        return True
+
+    async def _transcribe_uncovered(
+        self, transcriber, audio: "np.ndarray", model_size: str, match: "FingerprintMatch",
+    ) -> TranscriptResult:
+        """复用指纹匹配范围内的参考片段，只转录首尾未覆盖的部分"""
+        from app.services.speech_trimmer import AudioChunk
+
+        duration = len(audio) / SAMPLE_RATE
+        min_gap = settings.fingerprint_min_uncovered
+        start = match.query_start if match.query_start >= min_gap else 0.0
+        end = match.query_end if duration - match.query_end >= min_gap else duration
+
+        pieces = [(match.shifted(), AudioChunk(0.0, duration, start, end))]
+        if start > 0:
+            pieces.insert(0, (None, AudioChunk(0.0, start, 0.0, start)))
+        if end < duration:
+            pieces.append((None, AudioChunk(end, duration, end, duration)))
+        logger.info(
+            f"♻️  命中音频指纹 (得分 {match.score:.2f})，复用 {start:.1f}s ~ {end:.1f}s，"
+            f"转录 {len(pieces) - 1} 段未覆盖部分"
+        )
+
+        results = await asyncio.gather(*[
+            transcriber.transcribe(audio[int(c.start * SAMPLE_RATE):int(c.end * SAMPLE_RATE)], model_size)
+            for result, c in pieces if result is None
+        ])
+        transcribed = iter(results)
+        merged = merge_chunk_results(
+            [result if result is not None else next(transcribed) for result, _ in pieces],
+            [c for _, c in pieces],
+        )
+        if len(pieces) == 1:
+            merged.model = match.transcript.model
+        return merged
+
+    @staticmethod
+    async def _cache_key(audio: AudioInput, model_size: str, digest: Optional[str] = None) -> str:
+        """音频内容哈希 + 模型 + 语言 + 解码参数"""
+        from app.services.transcript_cache import audio_digest, cache_key
+
+        if digest is None:
+            loop = asyncio.get_event_loop()
+            digest = await loop.run_in_executor(None, audio_digest, audio)
+        return cache_key(digest, model_size, settings.whisper_language, TranscriberService._decode_params())
+
+    @staticmethod
+    def _decode_params() -> str:
+        """影响识别结果的解码参数"""
+        if settings.asr_mode == "api":
+            return "api"
+        return json.dumps({**DECODE_OPTIONS, "batched": settings.asr_batch_enabled and batching_supported()}, sort_keys=True)
+
+    @staticmethod
+    def _asr_profile(model_size: str) -> str:
+        """音频指纹条目的 profile：模型 + 语言 + 解码参数相同的转录结果才能互相复用"""
+        return json.dumps({
+            "model": model_size,
+            "language": settings.whisper_language,
+            "params": TranscriberService._decode_params(),
+        }, sort_keys=True)
+
+    @staticmethod
+    def _should_split(audio: AudioInput) -> bool:
+        """多进程模式下，超过阈值的长音频切块并行转录"""
+        return (
+            settings.asr_mode != "api"
+            and settings.asr_workers > 1
+            and settings.asr_split_min_duration > 0
+            and not isinstance(audio, Path)
+            and len(audio) / SAMPLE_RATE > settings.asr_split_min_duration
+        )
+
+    async def _transcribe_split(self, transcriber, audio: "np.ndarray", model_size: str) -> TranscriptResult:
+        """在停顿处切块，分发给各个工作进程并行转录后合并"""
+        from app.services.speech_trimmer import split_on_silence
+
+        duration = len(audio) / SAMPLE_RATE
+        chunk_seconds = max(settings.asr_split_min_duration / 2, duration / settings.asr_workers)
+        chunks = split_on_silence(audio, SAMPLE_RATE, chunk_seconds, overlap=settings.asr_split_overlap)
+        if len(chunks) == 1:
+            return await transcriber.transcribe(audio, model_size)
+
+        logger.info(f"长音频 {duration:.0f}s 切分为 {len(chunks)} 块并行转录")
+        results = await asyncio.gather(*[
+            transcriber.transcribe(audio[int(c.start * SAMPLE_RATE):int(c.end * SAMPLE_RATE)], model_size)
+            for c in chunks
+        ])
+        return merge_chunk_results(list(results), chunks)
+
+    async def warmup(self):
+        """预加载本地模型（API 模式无需加载）"""
         transcriber = self._get_transcriber()
-        return await transcriber.transcribe(audio_path)
+        if isinstance(transcriber, LocalTranscriber):
+            await transcriber.warmup()
+
+    def stats(self) -> dict:
+        """ASR 后端运行指标"""
+        data = {"mode": settings.asr_mode, "active": self._active, "models": model_tiers()}
+        if settings.asr_workers > 0:
+            from app.services.asr_pool import asr_pool
+
+            data["process_pool"] = asr_pool.stats()
+        if settings.transcript_cache_enabled:
+            from app.services.transcript_cache import transcript_cache
+
+            data["transcript_cache"] = transcript_cache.stats()
+        if settings.fingerprint_enabled:
+            from app.services.audio_fingerprint import fingerprint_index
+
+            data["fingerprint"] = fingerprint_index.stats()
+        if self._local and self._local._batchers:
+            data["batcher"] = {size: b.stats() for size, b in self._local._batchers.items()}
+        return data
+
+    async def close(self):
+        if settings.asr_workers > 0:
+            from app.services.asr_pool import asr_pool
+
+            asr_pool.close()
+        if self._api is not None:
+            await self._api.close()
 
 
 # 全局单例
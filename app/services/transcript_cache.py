@@ -0,0 +1,168 @@
+"""
+转录结果缓存
+以解码后 PCM 音频的哈希 + 模型 + 语言 + 解码参数作为键，同一段音频换了链接、
+短链或重新上传也能直接复用转录结果。结果保存在磁盘上，按总大小做 LRU 淘汰
+"""
+
+import hashlib
+import logging
+import os
+import wave
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Optional, Union
+
+from app.config import settings
+from app.models.schemas import TranscriptResult
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 数组量化时每次处理的采样数
+PCM_BLOCK = 1024 * 1024
+
+
+def audio_digest(audio: Union[Path, "np.ndarray"]) -> str:
+    """
+    音频内容的 SHA-256
+
+    统一按 16 位 PCM 计算，同一段音频解码到内存或写成 WAV 得到相同的摘要：
+    float32 数组按 ffmpeg 的规则（乘 32768 取整并截断）量化为 int16，
+    WAV 文件（extract 输出的 pcm_s16le）只哈希采样数据（忽略文件头），其他文件哈希整个文件
+    """
+    digest = hashlib.sha256()
+    if not isinstance(audio, Path):
+        import numpy as np
+
+        for offset in range(0, len(audio), PCM_BLOCK):
+            block = np.asarray(audio[offset:offset + PCM_BLOCK], dtype=np.float32)
+            digest.update(np.clip(np.rint(block * 32768.0), -32768, 32767).astype('<i2').data)
+        return digest.hexdigest()
+
+    try:
+        with wave.open(str(audio), 'rb') as f:
+            while True:
+                frames = f.readframes(1024 * 1024)
+                if not frames:
+                    break
+                digest.update(frames)
+        return digest.hexdigest()
+    except (wave.Error, EOFError):
+        pass
+
+    with open(audio, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(digest: str, model: str, language: str, params: str) -> str:
+    """组合缓存键（模型、语言或解码参数不同的结果互不复用）"""
+    return hashlib.sha256(f"{digest}|{model}|{language}|{params}".encode()).hexdigest()
+
+
+class TranscriptCache:
+    """磁盘上的转录结果 LRU 缓存，每条记录一个 JSON 文件"""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # key -> 文件大小，按最近使用时间排序
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        # 记录被淘汰或删除时调用（参数为 key），例如同步清理引用该记录的音频指纹
+        self.on_evict: List[Callable[[str], None]] = []
+
+    def _load(self):
+        """按文件修改时间（即最近使用时间）重建索引"""
+        self._loaded = True
+        if not self.directory.exists():
+            return
+        entries = []
+        for path in self.directory.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total += size
+        if entries:
+            logger.info(f"已加载转录缓存: {len(entries)} 条，{self._total / 1024 / 1024:.1f} MB")
+
+    def __contains__(self, key: str) -> bool:
+        if not self._loaded:
+            self._load()
+        return key in self._index
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[TranscriptResult]:
+        if not self._loaded:
+            self._load()
+        if key not in self._index:
+            self.misses += 1
+            return None
+
+        path = self._path(key)
+        try:
+            result = TranscriptResult.model_validate_json(path.read_text(encoding='utf-8'))
+            os.utime(path)  # 刷新最近使用时间
+        except Exception as e:
+            logger.warning(f"读取转录缓存失败: {e}")
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._index.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: TranscriptResult):
+        if not self._loaded:
+            self._load()
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            data = result.model_dump_json().encode('utf-8')
+            tmp_path = self._path(key).with_suffix('.tmp')
+            tmp_path.write_bytes(data)
+            tmp_path.replace(self._path(key))
+        except OSError as e:
+            logger.warning(f"写入转录缓存失败: {e}")
+            return
+
+        self._total += len(data) - self._index.pop(key, 0)
+        self._index[key] = len(data)
+        while self._total > self.max_bytes and len(self._index) > 1:
+            self._remove(next(iter(self._index)))
+
+    def _remove(self, key: str):
+        self._total -= self._index.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+        for callback in self.on_evict:
+            callback(key)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._index),
+            "size_mb": round(self._total / 1024 / 1024, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 全局单例
+transcript_cache = TranscriptCache(
+    directory=Path(settings.transcript_cache_dir),
+    max_bytes=settings.transcript_cache_max_mb * 1024 * 1024,
+)
@@ -0,0 +1,62 @@
+"""
+测试 ffmpeg 子进程的 stdin 管道（离线，用 cat / sh 代替 ffmpeg）
+"""
+import asyncio
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.audio_extractor import AudioExtractor, _iter_pcm
+
+pytestmark = pytest.mark.skipif(shutil.which("sh") is None, reason="需要 POSIX shell")
+
+
+def test_spawn_feeds_stdin():
+    audio = np.arange(300_000, dtype=np.float32)
+    out = asyncio.run(AudioExtractor()._spawn(["cat"], _iter_pcm(audio, 64 * 1024), True))
+    assert np.array_equal(np.frombuffer(out, dtype=np.float32), audio)
+
+
+def test_spawn_reports_stderr_on_failure():
+    audio = np.zeros(50_000, dtype=np.float32)
+    with pytest.raises(RuntimeError, match="200000"):
+        asyncio.run(AudioExtractor()._spawn(["sh", "-c", "wc -c >&2; exit 1"], _iter_pcm(audio), False))
+
+
+def test_spawn_raises_feed_error():
+    async def broken():
+        yield b"\0" * 1024
+        raise ConnectionError("下载中断")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(AudioExtractor()._spawn(["cat"], broken(), True))
+
+
+def test_encode_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="不支持的上传编码格式"):
+        asyncio.run(AudioExtractor().encode(np.zeros(16000, dtype=np.float32), tmp_path / "a.opus", 32))
+
+
+def test_upload_format_validated(monkeypatch):
+    from pydantic import ValidationError
+
+    from app.config import Settings
+
+    monkeypatch.setenv("OPENAI_UPLOAD_FORMAT", "opus")
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_spawn_feeds_stdin()
+    test_spawn_reports_stderr_on_failure()
+    test_spawn_raises_feed_error()
+    test_encode_rejects_unknown_format(Path(tempfile.mkdtemp()))
+    print("✅ 全部通过")
@@ -0,0 +1,168 @@
+"""
+测试音频指纹去重（离线，使用合成的类语音信号和背景音乐）
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings
+from app.models.schemas import TranscriptResult, TranscriptSegment
+from app.services.audio_fingerprint import HASH_BYTES, FingerprintIndex, fingerprint
+from app.services.transcript_cache import TranscriptCache
+from app.services.transcriber import TranscriberService
+
+SR = 16000
+PROFILE = '{"language": "zh", "model": "small", "params": "{}"}'
+
+
+def speech(seconds: float, seed: int) -> np.ndarray:
+    """带共振峰的谐波音节，音节之间有停顿"""
+    rng = np.random.default_rng(seed)
+    parts, total = [], 0
+    while total < seconds * SR:
+        t = np.arange(int(rng.uniform(0.12, 0.35) * SR)) / SR
+        f0 = rng.uniform(90, 260) * (1 + 0.1 * rng.uniform(-1, 1) * t / t[-1])
+        formants = rng.uniform([300, 900, 2000], [900, 2200, 3200])
+        syllable = np.zeros(len(t))
+        for k in range(1, int(4000 / f0.max())):
+            gain = sum(np.exp(-((k * f0.mean() - f) / 150) ** 2) for f in formants) + 0.05
+            syllable += gain * np.sin(2 * np.pi * np.cumsum(k * f0) / SR)
+        parts += [syllable * np.hanning(len(t)) * rng.uniform(0.05, 0.3), np.zeros(int(rng.uniform(0.02, 0.3) * SR))]
+        total += len(parts[-2]) + len(parts[-1])
+    return np.concatenate(parts)[:int(seconds * SR)].astype(np.float32)
+
+
+def music(seconds: float, seed: int) -> np.ndarray:
+    """每半秒一个衰减的音符"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SR)) / SR
+    out = np.zeros(len(t))
+    beat = int(0.5 * SR)
+    for start in range(0, len(t), beat):
+        f, tt = rng.uniform(200, 1500), t[:min(beat, len(t) - start)]
+        out[start:start + len(tt)] += (np.sin(2 * np.pi * f * tt) + 0.5 * np.sin(3 * np.pi * f * tt)) * np.exp(-3 * tt)
+    return out.astype(np.float32)
+
+
+def mix(voice: np.ndarray, background: np.ndarray, db: float) -> np.ndarray:
+    """按 db 指定背景音乐相对人声的响度混音"""
+    rms = lambda x: np.sqrt(np.mean(x ** 2))
+    return voice + background * (rms(voice) / rms(background) * 10 ** (db / 20))
+
+
+def transcript(*texts: str, model: str = "small") -> TranscriptResult:
+    segments = [TranscriptSegment(start=i * 5.0, end=i * 5.0 + 4.5, text=text) for i, text in enumerate(texts)]
+    return TranscriptResult(raw_text="".join(texts), segments=segments, language="zh", model=model)
+
+
+def test_shared_background_not_matched():
+    background = music(40, 7)
+    index = FingerprintIndex(None)
+    for db in (-10, 0, 10):
+        index.add(f"a{db}", mix(speech(40, 1), background, db), transcript("甲"), PROFILE)
+    # 背景音乐相同、说话内容不同
+    for db in (-10, 0, 10):
+        assert index.match(mix(speech(40, 2), background, db), settings.fingerprint_match_threshold, PROFILE) is None
+
+
+def test_trimmed_reencoded_copy_matched():
+    original = mix(speech(40, 1), music(40, 7), -10)
+    index = FingerprintIndex(None)
+    index.add("orig", original, transcript("甲"), PROFILE)
+    index.add("other", speech(40, 3), transcript("乙"), PROFILE)
+
+    noise = np.random.default_rng(0).normal(0, 0.002, len(original)).astype(np.float32)
+    copy = (original * 0.7 + noise)[5 * SR + 64:]
+    match = index.match(copy, settings.fingerprint_match_threshold, PROFILE)
+    assert match is not None and match.clip_id == "orig"
+    assert abs(match.offset - 5.0) < 0.1
+
+
+def test_profile_mismatch_refused(tmp_path):
+    audio = speech(30, 1)
+    index = FingerprintIndex(tmp_path)
+    index.add("orig", audio, transcript("甲"), PROFILE)
+    assert index.match(audio, settings.fingerprint_match_threshold, PROFILE) is not None
+
+    other_model = PROFILE.replace("small", "medium")
+    other_language = PROFILE.replace("zh", "en")
+    assert index.match(audio, settings.fingerprint_match_threshold, other_model) is None
+    assert index.match(audio, settings.fingerprint_match_threshold, other_language) is None
+
+    # 重新加载后 profile 仍然生效
+    reloaded = FingerprintIndex(tmp_path)
+    assert reloaded.match(audio, settings.fingerprint_match_threshold, PROFILE).clip_id == "orig"
+    assert reloaded.match(audio, settings.fingerprint_match_threshold, other_model) is None
+
+
+class FakeTranscriber:
+    def __init__(self, text: str):
+        self.text = text
+
+    async def transcribe(self, audio, model_size=None, on_segment=None):
+        return transcript(self.text)
+
+
+def test_verify_match_compares_text():
+    audio = speech(30, 1)
+    index = FingerprintIndex(None)
+    index.add("orig", audio, transcript("今天教大家做", "红烧肉的做法", "先把肉切块", "焯水去腥", "最后收汁"), PROFILE)
+    match = index.match(audio, settings.fingerprint_match_threshold, PROFILE)
+    service = TranscriberService()
+
+    assert asyncio.run(service._verify_match(FakeTranscriber("先把肉切块，焯水"), audio, "small", match))
+    assert not asyncio.run(service._verify_match(FakeTranscriber("明天去海边玩"), audio, "small", match))
+
+
+def test_size_cap_evicts_least_recently_matched(tmp_path):
+    clips = {name: speech(20, seed) for seed, name in enumerate("abc")}
+    size = max(len(fingerprint(audio)[0]) for audio in clips.values()) * HASH_BYTES
+    index = FingerprintIndex(tmp_path, max_bytes=int(size * 2.5))
+    index.add("a", clips["a"], transcript("甲"), PROFILE)
+    index.add("b", clips["b"], transcript("乙"), PROFILE)
+    # 命中 a 之后，最久未使用的是 b
+    assert index.match(clips["a"], settings.fingerprint_match_threshold, PROFILE).clip_id == "a"
+    index.add("c", clips["c"], transcript("丙"), PROFILE)
+
+    assert index.match(clips["b"], settings.fingerprint_match_threshold, PROFILE) is None
+    assert not (tmp_path / "b.npz").exists()
+    assert index.match(clips["a"], settings.fingerprint_match_threshold, PROFILE).clip_id == "a"
+    assert index.stats()["entries"] == 2
+
+
+def test_follows_transcript_cache_eviction(tmp_path):
+    cache = TranscriptCache(tmp_path / "transcripts", max_bytes=len(transcript("甲").model_dump_json()) + 1)
+    index = FingerprintIndex(tmp_path / "fingerprints", keep=cache.__contains__)
+    cache.on_evict.append(index.discard)
+    a, b = speech(20, 1), speech(20, 2)
+    for key, audio in (("a", a), ("b", b)):
+        cache.put(key, transcript("甲"))
+        index.add(key, audio, transcript("甲"), PROFILE)
+
+    # 转录缓存放不下两条，a 被淘汰后指纹条目也随之移除
+    assert "a" not in cache
+    assert index.match(a, settings.fingerprint_match_threshold, PROFILE) is None
+    assert not (tmp_path / "fingerprints" / "a.npz").exists()
+    assert index.match(b, settings.fingerprint_match_threshold, PROFILE).clip_id == "b"
+
+    # 重启后丢弃转录缓存中已经不存在的条目
+    (tmp_path / "transcripts" / "b.json").unlink()
+    reloaded = FingerprintIndex(tmp_path / "fingerprints", keep=TranscriptCache(tmp_path / "transcripts", 1).__contains__)
+    assert reloaded.match(b, settings.fingerprint_match_threshold, PROFILE) is None
+    assert not any((tmp_path / "fingerprints").iterdir())
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_shared_background_not_matched()
+    test_trimmed_reencoded_copy_matched()
+    test_profile_mismatch_refused(Path(tempfile.mkdtemp()))
+    test_verify_match_compares_text()
+    test_size_cap_evicts_least_recently_matched(Path(tempfile.mkdtemp()))
+    test_follows_transcript_cache_eviction(Path(tempfile.mkdtemp()))
+    print("✅ 全部通过")
@@ -0,0 +1,75 @@
+"""
+测试浏览器抓取的就绪等待（离线，使用模拟页面，不启动浏览器）
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.browser_fetcher import BrowserFetcher
+
+
+class FakeResponse:
+    def __init__(self, url: str, content_type: str):
+        self.url = url
+        self.headers = {'content-type': content_type, 'content-length': '2048'}
+
+
+class FakePage:
+    """<video> 立即出现（src 为 blob:），媒体响应稍后才到"""
+
+    def __init__(self, media_delay: float):
+        self.url = "https://www.douyin.com/video/7605511073625656611"
+        self.media_delay = media_delay
+        self.listeners = []
+
+    def on(self, event, handler):
+        self.listeners.append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners.remove(handler)
+
+    async def goto(self, url, **kwargs):
+        async def respond():
+            await asyncio.sleep(self.media_delay)
+            for handler in list(self.listeners):
+                await handler(FakeResponse("https://v26.douyinvod.com/abc/video.mp4", "video/mp4"))
+        asyncio.ensure_future(respond())
+
+    async def wait_for_selector(self, selector, **kwargs):
+        return object()
+
+    async def evaluate(self, script):
+        return "blob:https://www.douyin.com/5f0c"
+
+    async def title(self):
+        return "测试视频"
+
+    async def query_selector(self, selector):
+        return None
+
+    async def get_attribute(self, selector, name):
+        return None
+
+
+def test_selector_before_media_waits_for_response():
+    video_info, renditions = asyncio.run(
+        BrowserFetcher()._fetch_with_page(FakePage(media_delay=0.2), "https://v.douyin.com/abc/")
+    )
+    assert [r.url for r in renditions] == ["https://v26.douyinvod.com/abc/video.mp4"]
+    assert video_info.video_id == "7605511073625656611"
+
+
+def test_blob_src_rejected():
+    # 媒体响应始终没到，DOM 中只有 blob: 地址
+    _, renditions = asyncio.run(
+        BrowserFetcher()._fetch_with_page(FakePage(media_delay=60), "https://v.douyin.com/abc/")
+    )
+    assert renditions == []
+
+
+if __name__ == "__main__":
+    test_selector_before_media_waits_for_response()
+    test_blob_src_rejected()
+    print("✅ 全部通过")
@@ -0,0 +1,95 @@
+"""
+测试长音频在停顿处切块与分块结果合并（离线，使用合成音频）
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.schemas import TranscriptResult, TranscriptSegment
+from app.services.speech_trimmer import AudioChunk, split_on_silence
+from app.services.transcriber import merge_chunk_results
+
+SR = 16000
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / SR
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def test_split_short_audio_single_chunk():
+    assert split_on_silence(tone(12), SR, chunk_seconds=10) == [AudioChunk(0.0, 12.0, 0.0, 12.0)]
+
+
+def test_split_on_pauses():
+    # 每 4s 语音后停顿 0.5s，共 45s
+    audio = np.concatenate([np.concatenate([tone(4), np.zeros(SR // 2, dtype=np.float32)]) for _ in range(10)])
+    chunks = split_on_silence(audio, SR, chunk_seconds=10)
+
+    assert len(chunks) > 1
+    assert chunks[0].start == 0.0 and chunks[-1].end == 45.0
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # 在停顿处切开的块互不重叠
+        assert previous.end == chunk.start == previous.keep_end == chunk.keep_start
+        assert (previous.end % 4.5) > 4.0
+    for chunk in chunks[:-1]:
+        assert abs(chunk.end - chunk.start - 10) <= 2.5
+
+
+def test_split_hard_cut_overlaps():
+    chunks = split_on_silence(tone(40), SR, chunk_seconds=10, overlap=1.0)
+    assert chunks == [
+        AudioChunk(0.0, 11.0, 0.0, 10.0),
+        AudioChunk(9.0, 21.0, 10.0, 20.0),
+        AudioChunk(19.0, 31.0, 20.0, 30.0),
+        AudioChunk(29.0, 40.0, 30.0, 40.0),
+    ]
+
+
+def result(*segments, language="zh", confidence=0.0) -> TranscriptResult:
+    return TranscriptResult(
+        segments=[TranscriptSegment(start=s, end=e, text=t) for s, e, t in segments],
+        language=language,
+        confidence=confidence,
+    )
+
+
+def test_merge_chunk_results():
+    chunks = [AudioChunk(0.0, 11.0, 0.0, 10.0), AudioChunk(9.0, 20.0, 10.0, 20.0)]
+    results = [
+        # 第一块的最后一句中点落在 10s 之后，由第二块负责
+        result((0.0, 4.0, "一"), (4.0, 9.8, "二"), (9.8, 11.0, "三"), confidence=0.8),
+        # 第二块开头与第一块重复的部分
+        result((0.0, 0.9, "二"), (0.8, 2.0, "三"), (2.0, 10.5, "四"), language="", confidence=0.6),
+    ]
+    merged = merge_chunk_results(results, chunks)
+
+    assert [(s.start, s.end, s.text) for s in merged.segments] == [
+        (0.0, 4.0, "一"), (4.0, 9.8, "二"), (9.8, 11.0, "三"), (11.0, 19.5, "四"),
+    ]
+    assert merged.raw_text == "一二三四"
+    assert merged.language == "zh"
+    assert merged.confidence == 0.7
+
+
+def test_merge_drops_repeated_text_in_overlap():
+    chunks = [AudioChunk(0.0, 11.0, 0.0, 10.0), AudioChunk(9.0, 20.0, 10.0, 20.0)]
+    results = [
+        result((8.0, 10.4, "重复")),
+        # 同一句话在第二块中被识别成稍有偏差的时间
+        result((0.9, 2.0, "重复"), (2.0, 5.0, "后面")),
+    ]
+    merged = merge_chunk_results(results, chunks)
+    assert [s.text for s in merged.segments] == ["重复", "后面"]
+
+
+if __name__ == "__main__":
+    test_split_short_audio_single_chunk()
+    test_split_on_pauses()
+    test_split_hard_cut_overlaps()
+    test_merge_chunk_results()
+    test_merge_drops_repeated_text_in_overlap()
+    print("✅ 全部通过")
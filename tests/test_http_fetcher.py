@@ -0,0 +1,60 @@
+"""
+测试 HTTP 快速解析（离线，使用保存的分享页 HTML）
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.douyin_parser import douyin_parser
+from app.models.schemas import MediaPolicy
+from app.services.http_fetcher import parse_share_page
+from app.services.media_selector import select_rendition
+
+FIXTURE = Path(__file__).parent / "fixtures" / "iesdouyin_share.html"
+
+
+def test_parse_share_page():
+    item = parse_share_page(FIXTURE.read_text(encoding="utf-8"))
+    assert item is not None
+    assert item["aweme_id"] == "7605511073625656611"
+
+
+def test_parse_aweme_from_share_page():
+    item = parse_share_page(FIXTURE.read_text(encoding="utf-8"))
+    video_info, renditions = douyin_parser.parse_aweme(item, "https://v.douyin.com/abc/")
+
+    assert video_info.video_id == "7605511073625656611"
+    assert video_info.author == "厨房小白"
+    assert video_info.duration == 58.32
+    assert video_info.cover_url.endswith("cover.jpeg")
+
+    # 带水印地址替换为无水印地址
+    assert "/play/" in renditions[0].url
+    assert [r.bitrate for r in renditions[1:]] == [1203456, 654321]
+
+
+def test_select_rendition_mixed_units():
+    item = parse_share_page(FIXTURE.read_text(encoding="utf-8"))
+    video_info, renditions = douyin_parser.parse_aweme(item, "https://v.douyin.com/abc/")
+
+    # play_addr 只有大小，bit_rate[] 只有码率：码率按时长换算为字节后再比较
+    renditions[0].size = 3_000_000
+    for rendition in renditions[1:]:
+        rendition.size = 0
+    lowest = select_rendition(renditions, MediaPolicy.LOWEST, video_info.duration)
+    highest = select_rendition(renditions, MediaPolicy.HIGHEST, video_info.duration)
+    assert lowest is renditions[0]
+    assert highest.bitrate == 1203456
+
+
+def test_parse_share_page_without_data():
+    assert parse_share_page("<html><body>验证码</body></html>") is None
+
+
+if __name__ == "__main__":
+    test_parse_share_page()
+    test_parse_aweme_from_share_page()
+    test_select_rendition_mixed_units()
+    test_parse_share_page_without_data()
+    print("✅ HTTP 快速解析测试通过")
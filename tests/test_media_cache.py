@@ -0,0 +1,64 @@
+"""
+测试签名 URL 过期时间解析与媒体地址缓存有效期（离线）
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.schemas import MediaRendition, VideoInfo
+from app.services.media_cache import EXPIRY_MARGIN, MediaURLCache, parse_url_expiry
+
+NOW = 1_760_000_000
+
+
+def test_parse_query_expiry():
+    assert parse_url_expiry(f"https://cdn.example.com/v.mp4?x-expires={NOW + 3600}&sig=abc", NOW) == NOW + 3600
+    assert parse_url_expiry(f"https://cdn.example.com/v.mp4?a=1&deadline={NOW + 60}", NOW) == NOW + 60
+    # 非数字的值不算
+    assert parse_url_expiry("https://cdn.example.com/v.mp4?expires=tomorrow", NOW) is None
+
+
+def test_parse_hex_path_expiry():
+    url = f"https://v26.douyinvod.com/3f2a9c0d1e/{NOW + 7200:08x}/video/tos/cn/abc.mp4"
+    assert parse_url_expiry(url, NOW) == NOW + 7200
+    # 超出合理范围的八位十六进制串不当作时间戳
+    assert parse_url_expiry(f"https://cdn.example.com/{NOW + 90 * 86400:08x}/v.mp4", NOW) is None
+    assert parse_url_expiry("https://cdn.example.com/deadbeef/v.mp4", NOW) is None
+    assert parse_url_expiry("https://cdn.example.com/video/v.mp4", NOW) is None
+
+
+def rendition(expires_in: float) -> MediaRendition:
+    return MediaRendition(url=f"https://cdn.example.com/v.mp4?x-expires={int(time.time() + expires_in)}")
+
+
+def test_ttl_for():
+    cache = MediaURLCache(default_ttl=600)
+    assert cache.ttl_for([MediaRendition(url="https://cdn.example.com/v.mp4")]) == 600
+    # 上限为 default_ttl
+    assert cache.ttl_for([rendition(3600)]) == 600
+    # 取最早的过期时间并预留安全时间
+    ttl = cache.ttl_for([rendition(3600), rendition(300)])
+    assert 300 - EXPIRY_MARGIN - 2 <= ttl <= 300 - EXPIRY_MARGIN
+    # 已经或即将过期
+    assert cache.ttl_for([rendition(30)]) == 0.0
+    assert cache.ttl_for([rendition(-100)]) == 0.0
+
+
+def test_put_skips_expiring_urls():
+    cache = MediaURLCache(default_ttl=600)
+    info = VideoInfo(video_id="123")
+    cache.put(info, [rendition(30)], alias="https://v.douyin.com/abc/")
+    assert cache.get("123") is None
+
+    cache.put(info, [rendition(3600)], alias="https://v.douyin.com/abc/")
+    assert cache.get("https://v.douyin.com/abc/").video_info.video_id == "123"
+
+
+if __name__ == "__main__":
+    test_parse_query_expiry()
+    test_parse_hex_path_expiry()
+    test_ttl_for()
+    test_put_skips_expiring_urls()
+    print("✅ 全部通过")
@@ -0,0 +1,113 @@
+"""
+测试分段下载的字节范围切分与断点记录（离线，使用临时目录）
+"""
+import asyncio
+import re
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.media_downloader import DownloadCheckpoint, MediaDownloader, split_ranges
+
+CONTENT = bytes(range(256)) * 400
+
+
+def test_split_ranges_cover_whole_file():
+    for size, segments in [(100, 4), (103, 4), (10, 3), (1_000_003, 7)]:
+        ranges = split_ranges(size, segments)
+        assert len(ranges) == segments
+        assert ranges[0][0] == 0 and ranges[-1][1] == size - 1
+        # 闭区间首尾相接，没有重叠和空隙
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert start == end + 1
+    assert split_ranges(103, 4) == [(0, 24), (25, 49), (50, 74), (75, 102)]
+
+
+def test_split_ranges_small_file():
+    # 分段数不超过字节数
+    assert split_ranges(3, 8) == [(0, 0), (1, 1), (2, 2)]
+    assert split_ranges(100, 0) == [(0, 99)]
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    path = tmp_path / "video.mp4.part.json"
+    checkpoint = DownloadCheckpoint(path, 100, '"abc"', [[0, 49, 20], [50, 99, 50]])
+    checkpoint.save(force=True)
+
+    loaded = DownloadCheckpoint.load(path, 100, '"abc"')
+    assert loaded is not None
+    assert loaded.ranges == [[0, 49, 20], [50, 99, 50]]
+    assert loaded.done == 70
+
+
+def test_checkpoint_load_rejects_mismatch(tmp_path):
+    path = tmp_path / "video.mp4.part.json"
+    DownloadCheckpoint(path, 100, '"abc"', [[0, 99, 10]]).save(force=True)
+
+    assert DownloadCheckpoint.load(path, 101, '"abc"') is None
+    assert DownloadCheckpoint.load(path, 100, '"def"') is None
+    # 服务端这次没有返回 ETag 时只校验大小
+    assert DownloadCheckpoint.load(path, 100, None) is not None
+
+
+def test_checkpoint_load_missing_or_corrupt(tmp_path):
+    path = tmp_path / "video.mp4.part.json"
+    assert DownloadCheckpoint.load(path, 100, None) is None
+    path.write_text("{not json", encoding="utf-8")
+    assert DownloadCheckpoint.load(path, 100, None) is None
+
+    # 记录时没有 ETag，只要大小一致就可以续传
+    DownloadCheckpoint(path, 100, None, [[0, 99, 10]]).save(force=True)
+    assert DownloadCheckpoint.load(path, 100, '"abc"').done == 10
+
+
+def range_server(requests: list) -> httpx.AsyncClient:
+    """按 Range 返回 CONTENT 的模拟 CDN，记录收到的 Range 头"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.headers.get("range"))
+        await asyncio.sleep(0.01)
+        start, end = map(int, re.match(r"bytes=(\d+)-(\d+)", request.headers["range"]).groups())
+        return httpx.Response(206, content=CONTENT[start:end + 1], headers={
+            "content-range": f"bytes {start}-{end}/{len(CONTENT)}", "etag": '"v1"',
+        })
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_concurrent_tasks_get_own_files(tmp_path):
+    requests = []
+    downloader = MediaDownloader()
+    downloader._client = range_server(requests)
+    shared = tmp_path / "123.mp4"
+    outputs = [tmp_path / "123-a.mp4", tmp_path / "123-b.mp4"]
+
+    async def run():
+        await asyncio.gather(*[
+            downloader.download("https://cdn.example.com/v.mp4", path, resume_path=shared) for path in outputs
+        ])
+
+    asyncio.run(run())
+    assert all(path.read_bytes() == CONTENT for path in outputs)
+    # 排队的任务直接复用已完成的 .part，只有探测请求
+    assert len([r for r in requests if r != "bytes=0-0"]) == 1
+    # 最后一个任务结束后清理断点文件
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["123-a.mp4", "123-b.mp4"]
+
+    # 一个任务清理自己的文件不影响另一个
+    outputs[0].unlink()
+    assert outputs[1].read_bytes() == CONTENT
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_split_ranges_cover_whole_file()
+    test_split_ranges_small_file()
+    test_checkpoint_roundtrip(Path(tempfile.mkdtemp()))
+    test_checkpoint_load_rejects_mismatch(Path(tempfile.mkdtemp()))
+    test_checkpoint_load_missing_or_corrupt(Path(tempfile.mkdtemp()))
+    test_concurrent_tasks_get_own_files(Path(tempfile.mkdtemp()))
+    print("✅ 全部通过")
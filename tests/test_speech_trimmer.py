@@ -0,0 +1,84 @@
+"""
+测试语音区间裁剪与时间轴还原（离线，使用合成音频）
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.schemas import TranscriptResult, TranscriptSegment
+from app.services.speech_trimmer import OffsetMap, trim_audio
+
+SR = 16000
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / SR
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.random.default_rng(0).normal(0, 1e-4, int(seconds * SR)).astype(np.float32)
+
+
+def test_trim_audio_keeps_speech_spans():
+    # 静音 2s + 语音 3s + 静音 3s + 语音 2s + 静音 2s
+    audio = np.concatenate([silence(2), tone(3), silence(3), tone(2), silence(2)])
+    trimmed, offsets = trim_audio(audio, SR)
+
+    assert len(offsets.spans) == 2
+    (s1, e1), (s2, e2) = offsets.spans
+    # 每个区间前后各留 0.25s 余量
+    assert abs(s1 - 1.75) < 0.05 and abs(e1 - 5.25) < 0.05
+    assert abs(s2 - 7.75) < 0.05 and abs(e2 - 10.25) < 0.05
+    assert abs(len(trimmed) / SR - offsets.duration) < 0.01
+    assert not offsets.is_identity
+
+
+def test_trim_audio_small_saving_unchanged():
+    audio = np.concatenate([tone(10), silence(0.2)])
+    trimmed, offsets = trim_audio(audio, SR)
+    assert trimmed is audio
+    assert offsets.is_identity
+
+    # 没有检测到语音时原样返回
+    quiet = silence(5)
+    trimmed, offsets = trim_audio(quiet, SR)
+    assert trimmed is quiet
+    assert offsets.is_identity
+
+
+def test_offset_map_to_source():
+    offsets = OffsetMap([(2.0, 5.0), (8.0, 10.0)])
+    assert offsets.duration == 5.0
+
+    assert offsets.to_source(0.0) == 2.0
+    assert offsets.to_source(1.5) == 3.5
+    # 恰好落在拼接点：开始时间归到后一个区间，结束时间归到前一个区间
+    assert offsets.to_source(3.0) == 8.0
+    assert offsets.to_source(3.0, end=True) == 5.0
+    assert offsets.to_source(4.0) == 9.0
+    # 超出范围时截断在最后一个区间末尾
+    assert offsets.to_source(7.0) == 10.0
+    assert OffsetMap([]).to_source(1.25) == 1.25
+
+
+def test_offset_map_remap():
+    offsets = OffsetMap([(2.0, 5.0), (8.0, 10.0)])
+    result = TranscriptResult(segments=[
+        TranscriptSegment(start=0.5, end=3.0, text="第一句"),
+        TranscriptSegment(start=3.0, end=4.5, text="第二句"),
+    ])
+    segments = offsets.remap(result).segments
+    assert [(s.start, s.end) for s in segments] == [(2.5, 5.0), (8.0, 9.5)]
+    assert [s.text for s in segments] == ["第一句", "第二句"]
+
+
+if __name__ == "__main__":
+    test_trim_audio_keeps_speech_spans()
+    test_trim_audio_small_saving_unchanged()
+    test_offset_map_to_source()
+    test_offset_map_remap()
+    print("✅ 全部通过")
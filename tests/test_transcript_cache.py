@@ -0,0 +1,138 @@
+"""
+测试转录结果缓存的 LRU 淘汰（离线，使用临时目录）
+"""
+import asyncio
+import os
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.schemas import TranscriptResult, TranscriptSegment
+from app.services.transcript_cache import TranscriptCache, audio_digest, cache_key
+
+
+def result(text: str) -> TranscriptResult:
+    return TranscriptResult(raw_text=text, segments=[TranscriptSegment(start=0.0, end=1.0, text=text)])
+
+
+def entry_size() -> int:
+    return len(result("a").model_dump_json().encode('utf-8'))
+
+
+def test_get_put_roundtrip(tmp_path):
+    cache = TranscriptCache(tmp_path, max_bytes=1024 * 1024)
+    assert cache.get("a") is None
+    cache.put("a", result("a"))
+    assert cache.get("a").raw_text == "a"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_size_eviction_removes_least_recently_used(tmp_path):
+    cache = TranscriptCache(tmp_path, max_bytes=entry_size() * 3)
+    for key in "abc":
+        cache.put(key, result(key))
+    # 访问 a 之后，最久未使用的是 b
+    assert cache.get("a") is not None
+    cache.put("d", result("d"))
+
+    assert cache.get("b") is None
+    assert not (tmp_path / "b.json").exists()
+    assert [cache.get(key).raw_text for key in "acd"] == ["a", "c", "d"]
+    assert cache.stats()["entries"] == 3
+
+
+def test_overwrite_does_not_double_count(tmp_path):
+    cache = TranscriptCache(tmp_path, max_bytes=entry_size() * 2)
+    cache.put("a", result("a"))
+    cache.put("b", result("b"))
+    cache.put("a", result("x"))
+    assert cache.get("a").raw_text == "x"
+    assert cache.get("b") is not None
+
+
+def test_single_oversized_entry_kept(tmp_path):
+    cache = TranscriptCache(tmp_path, max_bytes=1)
+    cache.put("a", result("a"))
+    assert cache.get("a") is not None
+
+
+def test_reload_orders_by_mtime(tmp_path):
+    cache = TranscriptCache(tmp_path, max_bytes=entry_size() * 2)
+    cache.put("a", result("a"))
+    cache.put("b", result("b"))
+    # a 比 b 更近被使用
+    os.utime(tmp_path / "a.json", (2_000_000_000, 2_000_000_000))
+
+    reloaded = TranscriptCache(tmp_path, max_bytes=entry_size() * 2)
+    reloaded.put("c", result("c"))
+    assert reloaded.get("b") is None
+    assert reloaded.get("a") is not None and reloaded.get("c") is not None
+
+
+def test_cache_key_separates_model_and_language():
+    digest = audio_digest(np.zeros(16000, dtype=np.float32))
+    assert digest == audio_digest(np.zeros(16000, dtype=np.float32))
+    keys = {
+        cache_key(digest, "small", "zh", "{}"),
+        cache_key(digest, "medium", "zh", "{}"),
+        cache_key(digest, "small", "en", "{}"),
+        cache_key(digest, "small", "zh", "api"),
+    }
+    assert len(keys) == 4
+
+
+def test_digest_same_for_array_and_wav(tmp_path):
+    rng = np.random.default_rng(0)
+    audio = np.clip(rng.normal(0, 0.3, 48000), -1.2, 1.2).astype(np.float32)
+    # 与 ffmpeg 把 float 转为 pcm_s16le 的规则一致
+    pcm = np.clip(np.rint(audio * 32768.0), -32768, 32767).astype('<i2')
+    path = tmp_path / "audio.wav"
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(pcm.tobytes())
+    assert audio_digest(audio) == audio_digest(path)
+
+
+def test_transcribe_audio_keys_on_untrimmed_audio(monkeypatch):
+    from app.config import settings
+    from app.services import pipeline
+
+    monkeypatch.setattr(settings, "transcript_cache_enabled", True)
+    monkeypatch.setattr(settings, "speech_trim_enabled", True)
+    t = np.arange(16000 * 3) / 16000
+    tone = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    audio = np.concatenate([np.zeros(16000 * 3, dtype=np.float32), tone])
+
+    calls = []
+
+    async def transcribe(audio, quality=None, on_segment=None, digest=None):
+        calls.append((len(audio), digest))
+        return TranscriptResult(segments=[TranscriptSegment(start=0.0, end=1.0, text="a")])
+
+    monkeypatch.setattr(pipeline.transcriber_service, "transcribe", transcribe)
+    result = asyncio.run(pipeline.transcribe_audio(audio))
+
+    (length, digest), = calls
+    assert length < len(audio)
+    assert digest.startswith(audio_digest(audio) + "|trim:")
+    # 结果还原到裁剪前的时间轴
+    assert result.segments[0].start > 2.5
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_get_put_roundtrip(Path(tempfile.mkdtemp()))
+    test_size_eviction_removes_least_recently_used(Path(tempfile.mkdtemp()))
+    test_overwrite_does_not_double_count(Path(tempfile.mkdtemp()))
+    test_single_oversized_entry_kept(Path(tempfile.mkdtemp()))
+    test_reload_orders_by_mtime(Path(tempfile.mkdtemp()))
+    test_cache_key_separates_model_and_language()
+    test_digest_same_for_array_and_wav(Path(tempfile.mkdtemp()))
+    print("✅ 全部通过")